@@ -34,7 +34,7 @@ Feature: BookStore API Testing
 
     @POST_Books
     Scenario: Add books to user collection
-        Given I login with username "afinapd" password "Afina12345!"
+        Given I lease a test account
         When I remove books from my collection
         When I send a request to add book with isbn "9781449325862" to my collection
         Then the response status code should be 201
@@ -43,7 +43,7 @@ Feature: BookStore API Testing
 
     @DELETE_Books
     Scenario: Delete books from user collection
-        Given I login with username "afinapd" password "Afina12345!"
+        Given I lease a test account
         And I send a request to add book with isbn "9781449325862" to my collection
         When I remove books from my collection
         Then the response status code should be 204
@@ -1,28 +1,106 @@
 import logging
 import os
-import sys
 from datetime import datetime
-from dotenv import load_dotenv
-from src.api.api_client import APIClient
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('test.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
+from src.harness.startup import StartupProfile
+
+# STARTUP_PROFILE=1 times imports, hooks and the first request of this process
+PROFILE = StartupProfile(
+    os.getenv("STARTUP_PROFILE", "").lower() in ("1", "true", "yes"),
+    os.path.join(
+        os.getenv("METRICS_DIR", "reports"),
+        f"startup-worker-{os.getenv('BEHAVE_WORKER_ID')}.json" if os.getenv("BEHAVE_WORKER_ID") else "startup.json"
+    )
 )
 
+from src.harness.accounts import ACCOUNT_PATTERN
+from src.harness.history import DEFAULT_PATH as DEFAULT_HISTORY_PATH, DurationHistory
+from src.harness.logging_setup import begin_scenario, configure_logging, end_scenario, stop_logging
+from src.harness.snapshots import SnapshotStore
+
+# Heavy modules (the HTTP client, the stub server, the account pool) are
+# imported in before_all, only when the run uses them.
+
+@PROFILE.hook
 def before_all(context):
     """Initialize test environment and logging"""
-    # Load environment variables
+    from dotenv import load_dotenv
+    from src.api.api_client import APIClient
+    from src.api.metrics import MetricsRegistry
+    from src.api.token_cache import TokenCache
+    from src.harness.cleanup import CleanupQueue
+
+    # Load environment variables first, they configure everything below
     load_dotenv()
-    
-    # Initialize API client
-    context.api = APIClient()
-    context.base_url = "https://demoqa.com"
+
+    # Configure logging; file and stdout writes happen on a background listener.
+    # LOG_MODE=buffered keeps each scenario's records in memory until it fails.
+    configure_logging(
+        os.getenv('TEST_LOG_FILE', 'test.log'),
+        getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper(), logging.INFO),
+        buffered=os.getenv('LOG_MODE', 'full').lower() == 'buffered',
+        buffer_size=int(os.getenv('LOG_BUFFER_SIZE', '1000')),
+        backups=int(os.getenv('LOG_BACKUPS', '5'))
+    )
+
+    # Serve the API from an in-process stub when BOOKSTORE_STUB is set
+    context.stub = None
+    base_url = os.getenv("API_BASE_URL")
+    if os.getenv("BOOKSTORE_STUB", "").lower() in ("1", "true", "yes"):
+        from src.harness.stub_server import StubServer
+        latency = float(os.getenv("STUB_LATENCY_MS", "0")) / 1000
+        context.stub = StubServer(latency=latency).start()
+        context.stub.state.add_user(
+            os.getenv("TEST_USERNAME", "testuser"),
+            os.getenv("TEST_PASSWORD", "Test@123")
+        )
+        base_url = context.stub.base_url
+
+    # Record or replay traffic when API_CASSETTE names a JSONL cassette
+    cassette = None
+    if os.getenv("API_CASSETTE"):
+        from src.api.cassette import Cassette
+        cassette = Cassette(os.getenv("API_CASSETTE"), os.getenv("API_CASSETTE_MODE", "replay"))
+    context.cassette = cassette
+
+    # Initialize API client with a token cache, persisted when TOKEN_CACHE_FILE is set
+    context.api = APIClient(
+        base_url=base_url,
+        token_cache=TokenCache(path=os.getenv("TOKEN_CACHE_FILE")),
+        cassette=cassette
+    )
+    context.base_url = context.api.base_url
+
+    # Record per-endpoint latency, sizes and statuses of every request
+    context.metrics = MetricsRegistry()
+    context.api.add_request_hook(context.metrics.observe)
+    if PROFILE.enabled:
+        context.api.add_request_hook(PROFILE.observe_request)
+
+    # Scenario and step durations, used by the parallel runner for scheduling
+    context.history = DurationHistory(os.getenv("DURATION_HISTORY", DEFAULT_HISTORY_PATH))
+
+    # Run scenario teardown on background threads
+    context.cleanup = CleanupQueue(
+        context.api.base_url,
+        token_cache=context.api.token_cache,
+        request_hooks=[context.metrics.observe],
+        cassette=cassette
+    )
+
+    # Reuse the state left by precondition steps across scenarios unless SCENARIO_SNAPSHOTS is off
+    context.snapshots = None
+    if os.getenv("SCENARIO_SNAPSHOTS", "1").lower() not in ("0", "false", "no"):
+        context.snapshots = SnapshotStore()
+
+    # Provision ACCOUNT_POOL_SIZE authenticated accounts for leasing scenarios
+    context.accounts = None
+    pool_size = int(os.getenv("ACCOUNT_POOL_SIZE", "0"))
+    if pool_size > 0 and cassette is not None and cassette.replaying:
+        logging.warning("ACCOUNT_POOL_SIZE is ignored while replaying a cassette")
+    elif pool_size > 0:
+        from src.harness.account_pool import AccountPool
+        context.accounts = AccountPool(context.api.base_url, pool_size, token_cache=context.api.token_cache)
+        context.accounts.provision()
     
     # Initialize test data dictionary
     if not hasattr(context, 'test_data'):
@@ -39,14 +117,25 @@ def before_all(context):
     # Log test session start
     logging.info(f"Starting test session at {datetime.now()}")
 
+@PROFILE.hook
 def before_scenario(context, scenario):
     """Reset scenario-specific data before each scenario"""
+    begin_scenario(scenario.name)
+
     # Reset response and error state
     context.response = None
     context.error = None
+    context.lease = None
     
     # Reset API client token
     context.api.set_token(None)
+
+    # Scenarios tagged @no_cache send catalog requests over the wire
+    context.api.catalog.bypass = "no_cache" in scenario.tags
+
+    # Wait for queued cleanup of the accounts this scenario uses, by default the test user's
+    accounts = {account for step in scenario.all_steps for account in ACCOUNT_PATTERN.findall(step.name)}
+    context.cleanup.wait_for(*(accounts or {context.test_data.get("username")}))
     
     # Reset test data except credentials
     credentials = {
@@ -63,8 +152,17 @@ def before_scenario(context, scenario):
     # Log scenario start
     logging.info(f"\nStarting scenario: {scenario.name}")
 
+@PROFILE.hook
+def after_step(context, step):
+    """Record step duration"""
+    if step.status in ("passed", "failed"):
+        context.history.record_step(step.name, step.duration)
+
+@PROFILE.hook
 def after_scenario(context, scenario):
     """Cleanup after each scenario"""
+    if scenario.status in ("passed", "failed"):
+        context.history.record_scenario(scenario.filename, scenario.name, scenario.duration)
     try:
         # Log scenario result
         if scenario.status == "failed":
@@ -72,33 +170,34 @@ def after_scenario(context, scenario):
             if context.error:
                 logging.error(f"Error: {context.error}")
             if hasattr(context, 'response') and context.response:
-                logging.error(f"Last response: {context.response.text}")
+                logging.error(f"Last response: {context.api.loggable_body(context.response)}")
         else:
             logging.info(f"Scenario passed: {scenario.name}")
         
-        # Cleanup: Remove test user if created during scenario
-        if "POST_User" in scenario.tags and context.test_data.get("user_id"):
-            try:
-                context.api.delete_user(context.test_data["user_id"])
-                logging.info(f"Cleaned up test user {context.test_data['user_id']}")
-            except Exception as e:
-                logging.warning(f"Failed to cleanup test user: {e}")
-        
+        # Queue cleanup; later scenarios only wait for it when they use the same account
+        username = context.test_data.get("username")
+        user_id = context.test_data.get("user_id")
+
+        # Snapshots of an account a scenario changed, or left in an unknown state, are stale
+        if context.snapshots is not None:
+            context.snapshots.scenario_finished(username, scenario.status == "failed", scenario.tags)
+        if "POST_User" in scenario.tags and user_id:
+            context.cleanup.submit(
+                username, f"delete test user {user_id}",
+                lambda api: api.delete_user(user_id), token=context.api.token
+            )
+
+        # Return a leased account; the pool clears its collection in the background
+        if context.lease is not None:
+            context.accounts.release(context.lease)
+            context.lease = None
+
         # Cleanup: Remove test books if added during scenario
-        if "POST_Books" in scenario.tags and context.test_data.get("user_id"):
-            try:
-                response = context.api.get_user_books(context.test_data["user_id"])
-                if response.status_code == 200:
-                    books = response.json().get("books", [])
-                    for book in books:
-                        context.api.delete_book(
-                            context.test_data["user_id"],
-                            book["isbn"]
-                        )
-                    if books:
-                        logging.info(f"Cleaned up {len(books)} books from collection")
-            except Exception as e:
-                logging.warning(f"Failed to cleanup books: {e}")
+        elif "POST_Books" in scenario.tags and user_id:
+            context.cleanup.submit(
+                username, f"clear book collection of {user_id}",
+                lambda api: api.clear_collection(user_id), token=context.api.token
+            )
     except Exception as e:
         logging.error(f"Error in cleanup: {e}")
     finally:
@@ -118,15 +217,52 @@ def after_scenario(context, scenario):
             "user_id": "",
             "isbn": ""
         }
+        end_scenario(scenario.status == "failed", scenario.duration)
 
+@PROFILE.hook
 def before_feature(context, feature):
     """Setup before each feature"""
     logging.info(f"\nStarting feature: {feature.name}")
 
+@PROFILE.hook
 def after_feature(context, feature):
     """Cleanup after each feature"""
     logging.info(f"Completed feature: {feature.name}")
 
+@PROFILE.hook
 def after_all(context):
     """Cleanup after all tests"""
+    # Finish queued teardown first: its requests count towards the metrics,
+    # and the pool and stub must outlive it
+    abandoned = context.cleanup.drain(timeout=float(os.getenv("CLEANUP_TIMEOUT", "30")))
+    logging.info(f"Cleanup stats: {context.cleanup.stats()}, abandoned {abandoned}")
+
+    # Write per-endpoint latency percentiles as JSON and Prometheus text
+    worker_id = os.getenv("BEHAVE_WORKER_ID")
+    json_path, prom_path = context.metrics.write_reports(
+        os.getenv("METRICS_DIR", "reports"),
+        f"metrics-worker-{worker_id}" if worker_id else "metrics"
+    )
+    logging.info(f"Request latency by endpoint:\n{context.metrics.format_table()}")
+    logging.info(f"Metrics written to {json_path} and {prom_path}")
+
+    context.history.save()
+
+    # Release pooled connections
+    logging.info(f"Connection pool stats: {context.api.pool_stats()}")
+    logging.info(f"Token cache stats: {context.api.token_cache.stats()}")
+    logging.info(f"Catalog cache stats: {context.api.catalog.stats()}")
+    if context.snapshots is not None:
+        logging.info(f"Precondition snapshot stats: {context.snapshots.stats()}")
+    logging.info(f"Coalesced GET stats: {context.api.single_flight.stats()}")
+    logging.info(f"Throttle stats: {context.api.throttle.stats()}, open circuits: {context.api.breakers.stats()}")
+    if context.accounts:
+        context.accounts.close()
+    context.api.close()
+    if context.cassette is not None:
+        context.cassette.close()
+    if context.stub:
+        context.stub.stop()
+
     logging.info(f"\nCompleted test session at {datetime.now()}\n")
+    stop_logging()
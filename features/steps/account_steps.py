@@ -1,5 +1,6 @@
 from behave import given, when, then
 from assertpy import assert_that
+from src.harness.snapshots import snapshot
 
 @when('I send a request to generate token')
 def step_generate_token(context):
@@ -39,43 +40,42 @@ def step_delete_account(context):
     context.response = context.api.delete_user(context.test_data['user_id'])
 
 @given('I login with username "{username}" password "{password}"')
+@snapshot
 def step_login_with_credentials(context, username, password):
     # Store credentials in test_data
     context.test_data['username'] = username
     context.test_data['password'] = password
 
-    # Wait for 2 seconds before login
-    import time
-    time.sleep(2)
-
-    # Generate token first
-    response = context.api.generate_token(username, password)
-    data = response.json()
-    token = data.get('token')
-    assert_that(token).is_not_none()
-    context.api.set_token(token)
-
-    # Wait for 2 seconds after token generation
-    time.sleep(2)
-
-    # Login to get user ID
-    response = context.api.login(username, password)
-    data = response.json()
-    context.test_data['user_id'] = data['userId']
+    # Reuse a cached token and user ID, generating a new token on a miss
+    session = context.api.authenticate(username, password)
+    assert_that(session.get('token')).is_not_none()
+    context.test_data['user_id'] = session['user_id']
 
 @given('I am an authenticated user')
+@snapshot
 def step_authenticate_user(context):
-    # Generate token
-    response = context.api.login(
+    # Reuse a cached token or login for a new one
+    session = context.api.authenticate(
         context.test_data['username'],
-        context.test_data['password']
+        context.test_data['password'],
+        generate=False
     )
-    data = response.json()
-    token = data.get('token')
-    assert_that(token).is_not_none()
-    context.api.set_token(token)
-    
-    # Store user ID
-    context.test_data['user_id'] = data['userId']
+    assert_that(session.get('token')).is_not_none()
 
+    # Store user ID
+    context.test_data['user_id'] = session['user_id']
 
+@given('I lease a test account')
+def step_lease_account(context):
+    # Take a ready account from the pool, or use the configured test user
+    if context.accounts is None:
+        step_authenticate_user(context)
+        return
+    account = context.accounts.lease()
+    context.lease = account
+    context.test_data.update({
+        'username': account.username,
+        'password': account.password,
+        'user_id': account.user_id
+    })
+    context.api.set_token(account.token)
@@ -1,22 +1,13 @@
 from behave import given, when, then
 from assertpy import assert_that
+from src.api.schema import BOOK_SCHEMA, validate_response
+from src.harness.snapshots import snapshot
 
 @then('each book in collection should contain "{field}"')
 def step_verify_collection_book_field(context, field):
-    books = context.response.json()['books']
-    if not books:  # Collection might be empty, which is valid
-        return
-        
-    for book in books:
-        assert_that(book).contains_key(field)
-        # Additional validations based on field type
-        if field == 'pages':
-            assert_that(book[field]).is_instance_of(int)
-        elif field == 'publish_date':
-            assert_that(book[field]).matches(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z')
-        elif field in ['isbn', 'title', 'subTitle', 'author', 'publisher', 'description', 'website']:
-            assert_that(book[field]).is_instance_of(str)
-            assert_that(book[field]).is_not_empty()
+    result = validate_response(context.response, BOOK_SCHEMA, path='books')
+    # Collection might be empty, which is valid
+    result.assert_field(field)
 
 @when('I send a request to get all books')
 def step_get_all_books(context):
@@ -26,27 +17,17 @@ def step_get_all_books(context):
 
 @then('each book should contain "{field}"')
 def step_verify_book_field(context, field):
-    books = context.response.json()['books']
-    assert_that(books).is_not_empty()
-    
-    for book in books:
-        assert_that(book).contains_key(field)
-        # Additional validations based on field type
-        if field == 'pages':
-            assert_that(book[field]).is_instance_of(int)
-        elif field == 'publish_date':
-            assert_that(book[field]).matches(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z')
-        elif field in ['isbn', 'title', 'subTitle', 'author', 'publisher', 'description', 'website']:
-            assert_that(book[field]).is_instance_of(str)
-            assert_that(book[field]).is_not_empty()
+    result = validate_response(context.response, BOOK_SCHEMA, path='books')
+    assert_that(result.records).is_not_empty()
+    result.assert_field(field)
 
 @given('there are books available in the store')
+@snapshot
 def step_verify_books_available(context):
-    response = context.api.get_books()
-    books = response.json()['books']
-    assert_that(books).is_not_empty()
+    isbn = context.api.first_isbn()
+    assert_that(isbn).is_not_none()
     # Store first book's ISBN for later use
-    context.test_data['isbn'] = books[0]['isbn']
+    context.test_data['isbn'] = isbn
 
 @when('I send a request to get book with ISBN "{isbn}"')
 def step_get_book_by_isbn(context, isbn):
@@ -66,11 +47,11 @@ def step_add_book_to_collection(context, isbn):
 
 
 @given('I have a valid book ISBN')
+@snapshot
 def step_get_valid_isbn(context):
-    response = context.api.get_books()
-    books = response.json()['books']
-    assert_that(books).is_not_empty()
-    context.test_data['isbn'] = books[0]['isbn']
+    isbn = context.api.first_isbn()
+    assert_that(isbn).is_not_none()
+    context.test_data['isbn'] = isbn
 
 
 
@@ -80,7 +61,14 @@ def step_verify_book_added(context):
     books = response.json()['books']
     assert_that(books).extracting('isbn').contains(context.test_data['isbn'])
 
+def collection_has_book(context):
+    response = context.api.get_user_books(context.test_data['user_id'])
+    return response.status_code == 200 and any(
+        book['isbn'] == context.test_data['isbn'] for book in response.json().get('books', [])
+    )
+
 @given('I have a book in my collection')
+@snapshot(check=collection_has_book)
 def step_ensure_book_in_collection(context):
     # First get a valid ISBN if we don't have one
     if not context.test_data['isbn']:
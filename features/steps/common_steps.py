@@ -1,22 +1,14 @@
 from behave import then
 from assertpy import assert_that
+from src.api.schema import schema_for, validate_response
 
 @then('the response should contain "{field}"')
 def step_verify_response_field(context, field):
-    data = context.response.json()
-    assert_that(data).contains_key(field)
-    
+    validate_response(context.response, schema_for(context.response)).assert_field(field)
+
     # Store userId for later use
     if field == 'userId':
-        context.test_data['user_id'] = data[field]
-    
-    # Additional validations based on field type
-    if field == 'token':
-        assert_that(data[field]).is_not_empty()
-    elif field in ['expires', 'created_date']:
-        assert_that(data[field]).matches(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z')
-    elif field == 'isActive':
-        assert_that(data[field]).is_instance_of(bool)
+        context.test_data['user_id'] = context.response.json()[field]
 
 @then('the response should be a valid JSON')
 def step_verify_valid_json(context):
@@ -1,51 +1,238 @@
 import logging
+import threading
+import time
+import os
 import requests
-from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from typing import Callable, Dict, Iterable, List, Optional
+from src.api.base_client import BaseClient
+from src.api.cassette import Cassette
+from src.api.catalog_cache import CatalogCache
+from src.api.codec import get_codec
+from src.api.metrics import RequestRecord, endpoint_template
+from src.api.responses import APIResponse, build_response
+from src.api.retry import CircuitBreakers, CircuitOpenError, RetryPolicy, Throttle
+from src.api.singleflight import SingleFlight, request_key
+from src.api.token_cache import TokenCache
+from src.api.waiting import wait_until
 
 logger = logging.getLogger(__name__)
 
-class APIClient:
+class APIClient(BaseClient):
     """Client for interacting with the DemoQA BookStore API"""
-    
-    # API endpoints
-    ACCOUNT_BASE = "/Account/v1"
-    BOOKSTORE_BASE = "/BookStore/v1"
-    
-    def __init__(self):
-        """Initialize API client"""
-        self.base_url = "https://demoqa.com"
-        self.headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json"
+
+    # Connection pool defaults
+    DEFAULT_POOL_CONNECTIONS = 4
+    DEFAULT_POOL_MAXSIZE = 10
+
+    # Characters of request/response bodies written to debug logs
+    LOG_BODY_LIMIT = 2048
+
+    # Maximum ISBNs sent in one add_books request
+    BATCH_SIZE = 50
+
+    # Deadline in seconds for a freshly generated token to become usable
+    READY_TIMEOUT = 10
+
+    # Response encodings urllib3 can decode here: gzip, deflate, plus br with brotli installed
+    ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+
+    def __init__(self, base_url: Optional[str] = None,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 token_cache: Optional[TokenCache] = None,
+                 catalog_cache: Optional[CatalogCache] = None,
+                 cassette: Optional[Cassette] = None,
+                 log_body_limit: int = LOG_BODY_LIMIT,
+                 json_codec: Optional[str] = None,
+                 single_flight: Optional[SingleFlight] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 throttle: Optional[Throttle] = None,
+                 breakers: Optional[CircuitBreakers] = None,
+                 compress: Optional[bool] = None):
+        """Initialize API client
+
+        pool_connections is the number of hosts to keep pools for and
+        pool_maxsize the number of keep-alive sockets kept per host.
+        A cassette in record mode captures all traffic; in replay mode
+        responses come from the cassette and the network is not used.
+        json_codec names the backend decoding response bodies, see
+        src.api.codec.get_codec. Concurrent identical GETs share one
+        request through single_flight, which several clients may share;
+        set the attribute to None to send every GET. Failed requests are
+        retried according to retry_policy, all requests pass the throttle
+        (by default shared by every client in the process) and the circuit
+        breaker of their endpoint. compress (default: API_COMPRESSION,
+        on) negotiates compressed responses; request bodies are always
+        encoded with json_codec.
+        """
+        super().__init__(base_url)
+        self.token_cache = token_cache or TokenCache()
+        self.catalog = catalog_cache or CatalogCache()
+        self.cassette = cassette
+        self.log_body_limit = log_body_limit
+        self.codec = get_codec(json_codec)
+        self.single_flight = single_flight or SingleFlight()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.throttle = throttle or Throttle.shared()
+        self.breakers = breakers or CircuitBreakers()
+        # Callables receiving a RequestRecord after every request
+        self.request_hooks: List[Callable[[RequestRecord], None]] = []
+
+        # Reusable keep-alive session, built on first use
+        if compress is None:
+            compress = os.getenv("API_COMPRESSION", "1").lower() not in ("0", "false", "no")
+        self.compress = compress
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """Keep-alive session with pooled connections
+
+        Built on first access, so clients that never reach the network,
+        such as those replaying a cassette, never create one.
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    session.headers["Accept-Encoding"] = self.ACCEPT_ENCODING if self.compress else "identity"
+                    adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def __enter__(self) -> "APIClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the session and release pooled connections
+
+        A cassette belongs to whoever opened it and is left open.
+        """
+        if self._session is not None:
+            self._session.close()
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Return connection pool statistics
+
+        hits counts requests served on an already open connection,
+        new_connections counts sockets opened and in_flight the requests
+        currently waiting for a response.
+        """
+        requests_sent = 0
+        new_connections = 0
+        adapters = self._session.adapters.values() if self._session is not None else ()
+        for adapter in set(adapters):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                requests_sent += pool.num_requests
+                new_connections += pool.num_connections
+        return {
+            "requests": requests_sent,
+            "hits": max(requests_sent - new_connections, 0),
+            "new_connections": new_connections,
+            "in_flight": self._in_flight
         }
-        self.token = None
-        self.last_request_body = None
 
     def _log_request(self, method: str, url: str, headers: Dict, json: Optional[Dict] = None) -> None:
-        """Log request details"""
-        logger.info(f"{method} {url}")
-        logger.debug(f"Headers: {headers}")
-        if json:
-            logger.debug(f"Body: {json}")
+        """Log request details, formatting debug output only when enabled"""
+        logger.info("%s %s", method, url)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Headers: %s", {
+                name: "Bearer <redacted>" if name.lower() == "authorization" else value
+                for name, value in headers.items()
+            })
+            if json:
+                logger.debug("Body: %s", self._truncate(str(Cassette.redact(json))))
 
     def _log_response(self, response: requests.Response) -> None:
-        """Log response details"""
-        logger.info(f"Response: {response.status_code}")
-        logger.debug(f"Response body: {response.text}")
+        """Log response details, decoding the body only when debug is enabled"""
+        logger.info("Response: %s", response.status_code)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Response body: %s", self.loggable_body(response))
+
+    def loggable_body(self, response: requests.Response) -> str:
+        """Return a response body fit for logs: cut to the limit, secrets redacted
+
+        Bodies mentioning a password or token are decoded and logged with
+        those fields masked, or withheld when they are not JSON.
+        """
+        content = response.content or b""
+        if any(f'"{field}"'.encode() in content for field in Cassette.SECRET_FIELDS):
+            try:
+                return self._truncate(str(Cassette.redact(self.codec.loads(content))))
+            except ValueError:
+                return f"<{len(content)} bytes withheld>"
+        body = content[:self.log_body_limit].decode("utf-8", errors="replace")
+        if len(content) > self.log_body_limit:
+            body += f"... ({len(content)} bytes)"
+        return body
 
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
-        """Make HTTP request with logging"""
+    def _truncate(self, text: str) -> str:
+        """Cut text to the debug body limit"""
+        if len(text) <= self.log_body_limit:
+            return text
+        return f"{text[:self.log_body_limit]}... ({len(text)} chars)"
+
+    def _make_request(self, method: str, endpoint: str, **kwargs) -> APIResponse:
+        """Make HTTP request with logging, returning a parse-once response"""
         url = f"{self.base_url}{endpoint}"
-        
-        # Add token to headers if available
-        if self.token:
-            self.headers['Authorization'] = f'Bearer {self.token}'
-        
+        headers = self._request_headers()
+        extra_headers = kwargs.pop('headers', None)
+        if extra_headers:
+            headers = {**headers, **extra_headers}
+
+        # Identical GETs already in flight share that request and its parsed body
+        if method == 'GET' and self.single_flight is not None:
+            key = request_key(method, url, kwargs.get('params'), headers)
+            response, shared = self.single_flight.do(key, lambda: self._perform(method, url, headers, **kwargs))
+            if shared:
+                logger.info("%s %s (coalesced)", method, url)
+            return response
+        return self._perform(method, url, headers, **kwargs)
+
+    def _perform(self, method: str, url: str, headers: Dict, **kwargs) -> APIResponse:
+        """Send one request, running hooks and logging"""
         # Log request
-        self._log_request(method, url, self.headers, kwargs.get('json'))
+        self._log_request(method, url, headers, kwargs.get('json'))
         
-        # Make request
-        response = requests.request(method, url, headers=self.headers, **kwargs)
+        # Serve from the cassette or make request on the pooled session
+        started = time.perf_counter()
+        try:
+            if self.cassette is not None and self.cassette.replaying:
+                response = self.cassette.replay(method, url, kwargs.get('params'), kwargs.get('json'))
+            else:
+                response = self._send_with_retries(method, url, headers, **kwargs)
+                # Only the final response is recorded, so replay matches what the caller saw
+                if self.cassette is not None and self.cassette.recording:
+                    self.cassette.record(
+                        method, url, kwargs.get('params'), kwargs.get('json'),
+                        headers, response, time.perf_counter() - started
+                    )
+        except Exception as e:
+            if self.request_hooks:
+                self._run_hooks(
+                    method, url, None, time.perf_counter() - started, error=e, retries=getattr(e, 'retries', 0)
+                )
+            raise
+        if self.request_hooks:
+            self._run_hooks(
+                method, url, response, time.perf_counter() - started, retries=getattr(response, 'retries', 0)
+            )
         
         # Store request body for testing
         if kwargs.get('json'):
@@ -54,15 +241,108 @@ class APIClient:
         # Log response
         self._log_response(response)
         
+        return APIResponse(response, self.codec)
+
+    def _send_with_retries(self, method: str, url: str, headers: Dict, **kwargs) -> requests.Response:
+        """Send through the circuit breaker and throttle, retrying per the retry policy
+
+        The number of retries is set as `retries` on the returned response
+        or on the raised exception.
+        """
+        endpoint = endpoint_template(url)
+        breaker = self.breakers.get(method, endpoint)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {method} {endpoint}")
+        attempt = 0
+        while True:
+            self.throttle.acquire()
+            response = error = None
+            # Any failure, including errors that are not retried, is recorded so
+            # that a half-open circuit always learns the result of its trial
+            failed = True
+            try:
+                response = self._send(method, url, headers, **kwargs)
+                failed = response.status_code >= 500
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            finally:
+                breaker.record(failed=failed)
+            if response is not None and response.status_code == 429:
+                self.throttle.on_throttled()
+            elif response is not None:
+                self.throttle.on_success()
+
+            # A circuit opened by this request's own failures ends its retries
+            if not self.retry_policy.should_retry(method, endpoint, attempt, response, error) \
+                    or not breaker.allow():
+                break
+            delay = self.retry_policy.delay(attempt, response)
+            logger.info("Retrying %s %s in %.2fs after %s", method, url, delay,
+                        repr(error) if error is not None else f"status {response.status_code}")
+            time.sleep(delay)
+            attempt += 1
+
+        if error is not None:
+            error.retries = attempt
+            raise error
+        response.retries = attempt
         return response
 
-    def set_token(self, token: Optional[str]) -> None:
-        """Set or clear authentication token"""
-        self.token = token
-        if token:
-            self.headers["Authorization"] = f"Bearer {token}"
-        elif "Authorization" in self.headers:
-            del self.headers["Authorization"]
+    def _send(self, method: str, url: str, headers: Dict, **kwargs) -> requests.Response:
+        """Send one attempt of a request over the network"""
+        # Watch the host's pool to tell whether this request opened a socket
+        pool = None
+        if self.request_hooks:
+            pool = self.session.get_adapter(url).poolmanager.connection_from_url(url)
+            connections_before = pool.num_connections
+
+        with self._in_flight_lock:
+            self._in_flight += 1
+        # Encode JSON bodies with the client's codec instead of requests' default
+        request_kwargs = dict(kwargs)
+        body = request_kwargs.pop('json', None)
+        if body is not None:
+            request_kwargs['data'] = self.codec.dumps(body)
+
+        try:
+            response = self.session.request(method, url, headers=headers, **request_kwargs)
+        finally:
+            with self._in_flight_lock:
+                self._in_flight -= 1
+        if pool is not None:
+            response.new_connection = pool.num_connections > connections_before
+        return response
+
+    def add_request_hook(self, hook: Callable[[RequestRecord], None]) -> None:
+        """Register a callable receiving a RequestRecord after each request"""
+        self.request_hooks.append(hook)
+
+    def _run_hooks(self, method: str, url: str, response: Optional[requests.Response],
+                   duration: float, error: Optional[Exception] = None, retries: int = 0) -> None:
+        """Build a RequestRecord and pass it to the request hooks"""
+        record = RequestRecord(
+            method=method,
+            endpoint=endpoint_template(url),
+            status=response.status_code if response is not None else 0,
+            duration=duration,
+            retries=retries,
+            error=repr(error) if error is not None else None
+        )
+        if response is not None:
+            request = response.request
+            record.replayed = request is None
+            record.ttfb = None if record.replayed else response.elapsed.total_seconds()
+            record.request_bytes = len(request.body or b"") if request is not None else 0
+            record.response_bytes = len(response.content or b"")
+            # Bytes read off the socket, i.e. before decompression
+            raw = response.raw
+            record.wire_bytes = raw.tell() if raw is not None and hasattr(raw, "tell") else record.response_bytes
+            record.new_connection = getattr(response, "new_connection", False)
+        for hook in self.request_hooks:
+            try:
+                hook(record)
+            except Exception:
+                logger.exception("Request hook %r failed", hook)
 
     # HTTP methods
     def get(self, endpoint: str, params: Optional[Dict] = None) -> requests.Response:
@@ -80,11 +360,7 @@ class APIClient:
     # Authentication endpoints
     def create_user(self, username: str, password: str) -> requests.Response:
         """Create a new user"""
-        payload = {
-            "userName": username,
-            "password": password
-        }
-        return self.post(f"{self.ACCOUNT_BASE}/User", json=payload)
+        return self.post(f"{self.ACCOUNT_BASE}/User", json=self._credentials(username, password))
 
     def get_user(self, user_id: str) -> requests.Response:
         """Get user account details"""
@@ -92,40 +368,134 @@ class APIClient:
 
     def delete_user(self, user_id: str) -> requests.Response:
         """Delete user account"""
-        return self.delete(f"{self.ACCOUNT_BASE}/User/{user_id}")
+        response = self.delete(f"{self.ACCOUNT_BASE}/User/{user_id}")
+        if response.status_code in (200, 204):
+            self.token_cache.invalidate_user(user_id)
+        return response
 
     def login(self, username: str, password: str) -> requests.Response:
         """Login user and get token"""
-        payload = {
-            "userName": username,
-            "password": password
-        }
-        return self.post(f"{self.ACCOUNT_BASE}/Login", json=payload)
+        response = self.post(f"{self.ACCOUNT_BASE}/Login", json=self._credentials(username, password))
+        self._remember_token(username, password, response)
+        return response
 
     def generate_token(self, username: str, password: str) -> requests.Response:
         """Generate authentication token"""
-        payload = {
-            "userName": username,
-            "password": password
-        }
-        return self.post(f"{self.ACCOUNT_BASE}/GenerateToken", json=payload)
+        response = self.post(f"{self.ACCOUNT_BASE}/GenerateToken", json=self._credentials(username, password))
+        self._remember_token(username, password, response)
+        return response
+
+    def authorized(self, username: str, password: str) -> requests.Response:
+        """Check whether the user has a valid token"""
+        return self.post(f"{self.ACCOUNT_BASE}/Authorized", json=self._credentials(username, password))
+
+    def wait_until_authorized(self, username: str, password: str, timeout: float = READY_TIMEOUT) -> None:
+        """Poll Authorized until the user's token is accepted"""
+        def probe():
+            response = self.authorized(username, password)
+            return response.status_code == 200 and response.json() is True
+
+        wait_until(probe, f"{username} to be authorized", timeout=timeout)
+
+    def _remember_token(self, username: str, password: str, response: requests.Response) -> None:
+        """Cache token, expiry and user ID from a Login/GenerateToken response"""
+        if response.status_code != 200:
+            return
+        try:
+            data = response.json()
+        except ValueError:
+            return
+        self.token_cache.store(
+            username,
+            password,
+            token=data.get("token"),
+            expires=data.get("expires"),
+            user_id=data.get("userId")
+        )
+
+    def authenticate(self, username: str, password: str, generate: bool = True) -> Dict:
+        """Authenticate with cached credentials where possible
+
+        Returns the cache entry with `token` and `user_id` and sets the
+        token on the client. A cached token is reused until shortly before
+        it expires, otherwise a token is generated and the user ID looked
+        up with a login. With generate=False a cache miss only logs in and
+        uses the token returned by Login.
+        """
+        entry = self.token_cache.get(username, password)
+        if entry is None and not generate:
+            self.login(username, password)
+            entry = self.token_cache.peek(username, password)
+        elif entry is None:
+            # Failed generation answers 200 with a null token; nothing to wait for then
+            response = self.generate_token(username, password)
+            if response.status_code == 200 and response.json().get("token"):
+                self.wait_until_authorized(username, password)
+            if not self.token_cache.peek(username, password).get("user_id"):
+                self.login(username, password)
+            entry = self.token_cache.peek(username, password)
+        self.set_token(entry.get("token"))
+        return entry
 
     # Book endpoints
-    def get_books(self) -> requests.Response:
-        """Get all books"""
-        return self.get(f"{self.BOOKSTORE_BASE}/Books")
+    def get_books(self, bypass_cache: bool = False) -> requests.Response:
+        """Get all books, served from the catalog cache while fresh"""
+        endpoint = f"{self.BOOKSTORE_BASE}/Books"
+        if bypass_cache or self.catalog.bypass:
+            response = self.get(endpoint)
+            self.catalog.store_catalog(response)
+            return response
+
+        cached = self.catalog.catalog()
+        if cached is not None:
+            logger.info("GET %s%s (cached)", self.base_url, endpoint)
+            return cached
+
+        # Revalidate a stale catalog when the server sent validators
+        response = self._make_request('GET', endpoint, headers=self.catalog.validators())
+        if response.status_code == 304:
+            return self.catalog.revalidated()
+        self.catalog.store_catalog(response)
+        return response
 
-    def get_book(self, isbn: str) -> requests.Response:
-        """Get book by ISBN"""
-        return self.get(f"{self.BOOKSTORE_BASE}/Book", params={"ISBN": isbn})
+    def get_book(self, isbn: str, bypass_cache: bool = False) -> requests.Response:
+        """Get book by ISBN, served from the catalog cache when indexed"""
+        endpoint = f"{self.BOOKSTORE_BASE}/Book"
+        if not (bypass_cache or self.catalog.bypass):
+            book = self.catalog.lookup(isbn)
+            if book is None and not self.catalog.loaded:
+                self.get_books()
+                book = self.catalog.lookup(isbn)
+            if book is not None:
+                url = f"{self.base_url}{endpoint}?ISBN={isbn}"
+                logger.info("GET %s (cached)", url)
+                return APIResponse(build_response(200, book, url), self.codec, parsed=book)
+
+        response = self.get(endpoint, params={"ISBN": isbn})
+        if response.status_code == 200:
+            self.catalog.store_book(response.json())
+        return response
+
+    def first_isbn(self) -> Optional[str]:
+        """Return the ISBN of the first book in the catalog"""
+        books = self.get_books().json().get("books", [])
+        return books[0]["isbn"] if books else None
 
     def add_book(self, user_id: str, isbn: str) -> requests.Response:
         """Add book to user's collection"""
-        payload = {
-            "userId": user_id,
-            "collectionOfIsbns": [{"isbn": isbn}]
-        }
-        return self.post(f"{self.BOOKSTORE_BASE}/Books", json=payload)
+        return self.post(f"{self.BOOKSTORE_BASE}/Books", json=self._collection(user_id, [isbn]))
+
+    def add_books(self, user_id: str, isbns: Iterable[str], batch_size: int = BATCH_SIZE) -> List[requests.Response]:
+        """Add several books to user's collection, batch_size ISBNs per request"""
+        isbns = list(isbns)
+        return [
+            self.post(f"{self.BOOKSTORE_BASE}/Books", json=self._collection(user_id, isbns[start:start + batch_size]))
+            for start in range(0, len(isbns), batch_size)
+        ]
+
+    def clear_collection(self, user_id: str) -> requests.Response:
+        """Delete every book from user's collection in one request"""
+        return self.delete(f"{self.BOOKSTORE_BASE}/Books?UserId={user_id}")
 
     def delete_book(self, user_id: str, isbn: str) -> requests.Response:
         """Delete book from user's collection"""
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import aiohttp
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+from src.api.base_client import BaseClient
+from src.api.codec import JSONCodec, get_codec
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncResponse:
+    """Fully read response returned by AsyncAPIClient, decoded at most once"""
+
+    def __init__(self, status_code: int, headers: Dict, content: bytes, url: str, codec=JSONCodec):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+        self.codec = codec
+        self._parsed = None
+        self._decoded = False
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        if not self._decoded:
+            self._parsed = self.codec.loads(self.content)
+            self._decoded = True
+        return self._parsed
+
+
+class AsyncAPIClient(BaseClient):
+    """Asyncio client for the DemoQA BookStore API
+
+    Exposes the same endpoint methods as APIClient as coroutines so that
+    independent calls can be awaited concurrently with gather().
+    """
+
+    # Default number of concurrent requests allowed by gather()
+    DEFAULT_CONCURRENCY = 8
+
+    def __init__(self, base_url: Optional[str] = None, concurrency: int = DEFAULT_CONCURRENCY,
+                 pool_maxsize: int = 10, json_codec: Optional[str] = None):
+        """Initialize async API client"""
+        super().__init__(base_url)
+        self.codec = get_codec(json_codec)
+        self.concurrency = concurrency
+        self.pool_maxsize = pool_maxsize
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    def from_client(cls, client: BaseClient, **kwargs) -> "AsyncAPIClient":
+        """Create an async client sharing base URL and token with another client"""
+        async_client = cls(client.base_url, **kwargs)
+        async_client.set_token(client.token)
+        return async_client
+
+    async def __aenter__(self) -> "AsyncAPIClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self.pool_maxsize)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self) -> None:
+        """Close the session and release pooled connections"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _make_request(self, method: str, endpoint: str, **kwargs) -> AsyncResponse:
+        """Make HTTP request with logging"""
+        url = f"{self.base_url}{endpoint}"
+        headers = dict(self._request_headers())
+        logger.info("%s %s", method, url)
+
+        params = kwargs.get('params')
+        if params:
+            params = {key: value for key, value in params.items() if value is not None}
+        async with self._get_session().request(
+            method, url, headers=headers, params=params, json=kwargs.get('json')
+        ) as response:
+            content = await response.read()
+            result = AsyncResponse(
+                response.status, dict(response.headers), content, str(response.url), self.codec
+            )
+
+        # Store request body for testing
+        if kwargs.get('json'):
+            self.last_request_body = kwargs['json']
+
+        logger.info("Response: %s", result.status_code)
+        return result
+
+    async def gather(self, calls: Iterable[Union[Awaitable, Callable[[], Awaitable]]],
+                     limit: Optional[int] = None, return_exceptions: bool = False) -> List:
+        """Run calls concurrently with at most `limit` in flight
+
+        Accepts coroutines or zero-argument callables returning coroutines.
+        Results are returned in input order.
+        """
+        semaphore = asyncio.Semaphore(limit or self.concurrency)
+
+        async def run(call):
+            async with semaphore:
+                return await (call() if callable(call) else call)
+
+        return await asyncio.gather(*(run(call) for call in calls), return_exceptions=return_exceptions)
+
+    # HTTP methods
+    async def get(self, endpoint: str, params: Optional[Dict] = None) -> AsyncResponse:
+        """Send GET request"""
+        return await self._make_request('GET', endpoint, params=params)
+
+    async def post(self, endpoint: str, json: Optional[Dict] = None) -> AsyncResponse:
+        """Send POST request"""
+        return await self._make_request('POST', endpoint, json=json)
+
+    async def delete(self, endpoint: str, json: Optional[Dict] = None) -> AsyncResponse:
+        """Send DELETE request"""
+        return await self._make_request('DELETE', endpoint, json=json)
+
+    # Authentication endpoints
+    async def create_user(self, username: str, password: str) -> AsyncResponse:
+        """Create a new user"""
+        return await self.post(f"{self.ACCOUNT_BASE}/User", json=self._credentials(username, password))
+
+    async def get_user(self, user_id: str) -> AsyncResponse:
+        """Get user account details"""
+        return await self.get(f"{self.ACCOUNT_BASE}/User/{user_id}")
+
+    async def delete_user(self, user_id: str) -> AsyncResponse:
+        """Delete user account"""
+        return await self.delete(f"{self.ACCOUNT_BASE}/User/{user_id}")
+
+    async def login(self, username: str, password: str) -> AsyncResponse:
+        """Login user and get token"""
+        return await self.post(f"{self.ACCOUNT_BASE}/Login", json=self._credentials(username, password))
+
+    async def generate_token(self, username: str, password: str) -> AsyncResponse:
+        """Generate authentication token"""
+        return await self.post(f"{self.ACCOUNT_BASE}/GenerateToken", json=self._credentials(username, password))
+
+    async def authorized(self, username: str, password: str) -> AsyncResponse:
+        """Check whether the user has a valid token"""
+        return await self.post(f"{self.ACCOUNT_BASE}/Authorized", json=self._credentials(username, password))
+
+    # Book endpoints
+    async def get_books(self) -> AsyncResponse:
+        """Get all books"""
+        return await self.get(f"{self.BOOKSTORE_BASE}/Books")
+
+    async def get_book(self, isbn: str) -> AsyncResponse:
+        """Get book by ISBN"""
+        return await self.get(f"{self.BOOKSTORE_BASE}/Book", params={"ISBN": isbn})
+
+    async def add_book(self, user_id: str, isbn: str) -> AsyncResponse:
+        """Add book to user's collection"""
+        return await self.post(f"{self.BOOKSTORE_BASE}/Books", json=self._collection(user_id, [isbn]))
+
+    async def add_books(self, user_id: str, isbns: Iterable[str], batch_size: int = 50) -> List[AsyncResponse]:
+        """Add several books to user's collection, batches sent concurrently"""
+        isbns = list(isbns)
+        return await self.gather(
+            lambda batch=isbns[start:start + batch_size]: self.post(
+                f"{self.BOOKSTORE_BASE}/Books", json=self._collection(user_id, batch)
+            )
+            for start in range(0, len(isbns), batch_size)
+        )
+
+    async def clear_collection(self, user_id: str) -> AsyncResponse:
+        """Delete every book from user's collection in one request"""
+        return await self.delete(f"{self.BOOKSTORE_BASE}/Books?UserId={user_id}")
+
+    async def delete_book(self, user_id: str, isbn: str) -> AsyncResponse:
+        """Delete book from user's collection"""
+        return await self.delete(
+            f"{self.BOOKSTORE_BASE}/Books?UserId={user_id}",
+            json={"isbn": isbn}
+        )
+
+    async def get_user_books(self, user_id: str) -> AsyncResponse:
+        """Get user's book collection"""
+        return await self.get(f"{self.ACCOUNT_BASE}/User/{user_id}/Books")
+
+    async def delete_book_from_store(self, isbn: str, user_id: str) -> AsyncResponse:
+        """Delete book from bookstore"""
+        return await self.delete(
+            f"{self.BOOKSTORE_BASE}/Book",
+            json={"isbn": isbn, "userId": user_id}
+        )
+
+    # Batch helpers
+    async def get_books_by_isbn(self, isbns: Iterable[str]) -> List[AsyncResponse]:
+        """Look up several books concurrently"""
+        return await self.gather(lambda isbn=isbn: self.get_book(isbn) for isbn in isbns)
+
+    async def delete_books(self, user_id: str, isbns: Iterable[str]) -> List[AsyncResponse]:
+        """Delete several books from user's collection concurrently"""
+        return await self.gather(lambda isbn=isbn: self.delete_book(user_id, isbn) for isbn in isbns)
@@ -0,0 +1,57 @@
+import os
+from typing import Dict, Optional
+
+
+class BaseClient:
+    """Endpoint constants and auth handling shared by the API clients"""
+
+    # API endpoints
+    ACCOUNT_BASE = "/Account/v1"
+    BOOKSTORE_BASE = "/BookStore/v1"
+
+    DEFAULT_BASE_URL = "https://demoqa.com"
+
+    def __init__(self, base_url: Optional[str] = None):
+        """Initialize shared client state
+
+        The base URL defaults to the API_BASE_URL environment variable and
+        falls back to demoqa.com.
+        """
+        self.base_url = (base_url or os.getenv("API_BASE_URL") or self.DEFAULT_BASE_URL).rstrip("/")
+        self.headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        }
+        self.token = None
+        self.last_request_body = None
+
+    def set_token(self, token: Optional[str]) -> None:
+        """Set or clear authentication token"""
+        self.token = token
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        elif "Authorization" in self.headers:
+            del self.headers["Authorization"]
+
+    def _request_headers(self) -> Dict:
+        """Return headers for the next request"""
+        # Add token to headers if available
+        if self.token:
+            self.headers['Authorization'] = f'Bearer {self.token}'
+        return self.headers
+
+    @staticmethod
+    def _credentials(username: str, password: str) -> Dict:
+        """Build the credentials payload used by account endpoints"""
+        return {
+            "userName": username,
+            "password": password
+        }
+
+    @staticmethod
+    def _collection(user_id: str, isbns) -> Dict:
+        """Build the collection payload used by the Books endpoint"""
+        return {
+            "userId": user_id,
+            "collectionOfIsbns": [{"isbn": isbn} for isbn in isbns]
+        }
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+from src.api.responses import build_response
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when no recorded interaction matches a request"""
+
+
+class Cassette:
+    """Record/replay store of HTTP interactions in a JSONL file
+
+    A record session starts from an empty file, replacing any earlier
+    recording, and appends every request/response pair as one JSON line
+    as soon as it completes. In replay mode the file is
+    memory-mapped and indexed by request key; matching responses are
+    decoded on demand. Requests match on method, path, sorted query and
+    canonical JSON body, so the host does not matter. Repeated identical
+    requests replay their recordings in order and then keep returning the
+    last one. Secrets are redacted before anything is written.
+    """
+
+    REDACTED = "<redacted>"
+    SECRET_HEADERS = {"authorization", "cookie", "set-cookie"}
+    SECRET_FIELDS = {"password", "token"}
+    # Response headers worth keeping in a recording
+    KEPT_HEADERS = {"content-type", "etag", "last-modified", "retry-after"}
+
+    def __init__(self, path: str, mode: str = REPLAY):
+        """Open a cassette for recording or replay"""
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._file = None
+        self._mmap = None
+        self._index: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._positions: Dict[str, int] = defaultdict(int)
+        if mode == RECORD:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._file = open(path, "w", encoding="utf-8")
+        else:
+            self._load_index()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    @classmethod
+    def redact(cls, value: Any) -> Any:
+        """Return a copy of a JSON value with secret fields masked"""
+        if isinstance(value, dict):
+            return {
+                key: cls.REDACTED if key in cls.SECRET_FIELDS and val else cls.redact(val)
+                for key, val in value.items()
+            }
+        if isinstance(value, list):
+            return [cls.redact(item) for item in value]
+        return value
+
+    @classmethod
+    def key(cls, method: str, url: str, params: Optional[Dict] = None, body: Any = None) -> str:
+        """Return the deterministic match key of a request"""
+        parts = urlsplit(url)
+        query = parse_qsl(parts.query) + sorted((params or {}).items())
+        canonical = json.dumps(cls.redact(body), sort_keys=True, separators=(",", ":")) if body is not None else ""
+        digest = hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+        return f"{method.upper()} {parts.path}?{urlencode(sorted(query))} {digest}"
+
+    def record(self, method: str, url: str, params: Optional[Dict], body: Any, headers: Dict,
+               response: requests.Response, elapsed: float) -> None:
+        """Append one interaction to the cassette"""
+        try:
+            response_body = self.redact(response.json())
+        except ValueError:
+            response_body = response.text
+        entry = {
+            "key": self.key(method, url, params, body),
+            "method": method.upper(),
+            "url": url,
+            "params": params or None,
+            "request_headers": {
+                name: self.REDACTED if name.lower() in self.SECRET_HEADERS else value
+                for name, value in headers.items()
+            },
+            "request_body": self.redact(body),
+            "status": response.status_code,
+            "headers": {
+                name: value for name, value in response.headers.items()
+                if name.lower() in self.KEPT_HEADERS
+            },
+            "body": response_body,
+            "elapsed_ms": round(elapsed * 1000, 3)
+        }
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                logger.warning(f"Cassette {self.path} is closed, not recording {entry['key']}")
+                return
+            self._file.write(line)
+            self._file.flush()
+
+    def replay(self, method: str, url: str, params: Optional[Dict] = None, body: Any = None) -> requests.Response:
+        """Return the recorded response matching a request"""
+        key = self.key(method, url, params, body)
+        with self._lock:
+            entries = self._index.get(key)
+            if not entries:
+                raise CassetteMiss(f"No recorded interaction for {key} in {self.path}")
+            position = min(self._positions[key], len(entries) - 1)
+            self._positions[key] += 1
+            offset, length = entries[position]
+            entry = json.loads(self._mmap[offset:offset + length])
+
+        response = build_response(entry["status"], entry["body"], entry["url"], entry["headers"] or None)
+        response.recorded_elapsed_ms = entry.get("elapsed_ms")
+        return response
+
+    def rewind(self) -> None:
+        """Start replaying every key from its first recording again"""
+        with self._lock:
+            self._positions.clear()
+
+    def close(self) -> None:
+        """Close the underlying file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            logger.warning(f"Cassette {self.path} is empty, every request will miss")
+            return
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        offset = 0
+        size = len(self._mmap)
+        while offset < size:
+            end = self._mmap.find(b"\n", offset)
+            if end == -1:
+                end = size
+            if end > offset:
+                key = json.loads(self._mmap[offset:end])["key"]
+                self._index[key].append((offset, end - offset))
+            offset = end + 1
+        logger.info(f"Loaded cassette {self.path} with {len(self._index)} request keys")
@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogCache:
+    """Session-scoped cache of the BookStore catalog
+
+    Holds the last `/BookStore/v1/Books` response together with an index
+    of books by ISBN. The catalog and individually fetched books expire
+    after `ttl` seconds and the index keeps at most `max_entries` books,
+    evicting the least recently used. A stale catalog is revalidated with
+    the ETag/Last-Modified validators the server sent, when it sent any.
+    """
+
+    DEFAULT_TTL = 300
+    DEFAULT_MAX_ENTRIES = 1024
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Initialize catalog cache"""
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Set to send every catalog request over the wire
+        self.bypass = False
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._response: Optional[requests.Response] = None
+        self._loaded_at = 0.0
+        self._books: "OrderedDict[str, Dict]" = OrderedDict()
+        self._book_loaded_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether a catalog response has been cached"""
+        return self._response is not None
+
+    def catalog(self) -> Optional[requests.Response]:
+        """Return the cached catalog response while it is fresh"""
+        with self._lock:
+            if self._response is not None and not self._expired(self._loaded_at):
+                self.hits += 1
+                return self._response
+            self.misses += 1
+            return None
+
+    def validators(self) -> Dict[str, str]:
+        """Return conditional request headers for revalidating the catalog"""
+        with self._lock:
+            if self._response is None:
+                return {}
+            headers = {}
+            if self._response.headers.get("ETag"):
+                headers["If-None-Match"] = self._response.headers["ETag"]
+            if self._response.headers.get("Last-Modified"):
+                headers["If-Modified-Since"] = self._response.headers["Last-Modified"]
+            return headers
+
+    def revalidated(self) -> requests.Response:
+        """Mark the cached catalog fresh after a 304 and return it"""
+        with self._lock:
+            self.revalidations += 1
+            self._loaded_at = time.monotonic()
+            for isbn in self._books:
+                self._book_loaded_at[isbn] = self._loaded_at
+            return self._response
+
+    def store_catalog(self, response: requests.Response) -> None:
+        """Cache a successful catalog response and index its books"""
+        if response.status_code != 200:
+            return
+        try:
+            books = response.json().get("books", [])
+        except ValueError:
+            return
+        with self._lock:
+            self._response = response
+            self._loaded_at = time.monotonic()
+            for book in books:
+                self._put(book, self._loaded_at)
+
+    def store_book(self, book: Dict) -> None:
+        """Cache a single book fetched by ISBN"""
+        with self._lock:
+            self._put(book, time.monotonic())
+
+    def lookup(self, isbn: str) -> Optional[Dict]:
+        """Return a fresh cached book by ISBN"""
+        with self._lock:
+            book = self._books.get(isbn)
+            if book is None or self._expired(self._book_loaded_at[isbn]):
+                self.misses += 1
+                return None
+            self._books.move_to_end(isbn)
+            self.hits += 1
+            return book
+
+    def clear(self) -> None:
+        """Drop all cached data"""
+        with self._lock:
+            self._response = None
+            self._books.clear()
+            self._book_loaded_at.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "books": len(self._books)
+        }
+
+    def _expired(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at > self.ttl
+
+    def _put(self, book: Dict, loaded_at: float) -> None:
+        isbn = book.get("isbn")
+        if not isbn:
+            return
+        self._books[isbn] = book
+        self._books.move_to_end(isbn)
+        self._book_loaded_at[isbn] = loaded_at
+        while len(self._books) > self.max_entries:
+            evicted, _ = self._books.popitem(last=False)
+            del self._book_loaded_at[evicted]
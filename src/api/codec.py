@@ -0,0 +1,55 @@
+import json
+import os
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional faster backend
+    orjson = None
+
+
+class JSONCodec:
+    """Standard library JSON encoder/decoder"""
+
+    name = "json"
+
+    @staticmethod
+    def loads(data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+class OrjsonCodec:
+    """orjson encoder/decoder, used when the package is installed"""
+
+    name = "orjson"
+
+    @staticmethod
+    def loads(data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+    @staticmethod
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value)
+
+
+CODECS = {JSONCodec.name: JSONCodec}
+if orjson is not None:
+    CODECS[OrjsonCodec.name] = OrjsonCodec
+
+
+def get_codec(name: Optional[str] = None):
+    """Return a JSON codec by name
+
+    The name defaults to the API_JSON_CODEC environment variable. "auto"
+    (the default) picks the fastest installed backend.
+    """
+    name = (name or os.getenv("API_JSON_CODEC") or "auto").lower()
+    if name == "auto":
+        return OrjsonCodec if orjson is not None else JSONCodec
+    if name not in CODECS:
+        raise ValueError(f"JSON codec {name!r} is not available, choose from {sorted(CODECS)}")
+    return CODECS[name]
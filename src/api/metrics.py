@@ -0,0 +1,239 @@
+import json
+import os
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Path segments replaced by placeholders in endpoint templates
+_TEMPLATE_RULES = [
+    (re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"), "{id}"),
+    (re.compile(r"^(97[89])?\d{9}[\dXx]$"), "{isbn}"),
+    (re.compile(r"^\d+$"), "{n}"),
+]
+
+
+def endpoint_template(url: str) -> str:
+    """Return the path of a URL with IDs replaced, e.g. /Account/v1/User/{id}"""
+    segments = urlsplit(url).path.split("/")
+    for index, segment in enumerate(segments):
+        for pattern, placeholder in _TEMPLATE_RULES:
+            if pattern.match(segment):
+                segments[index] = placeholder
+                break
+    return "/".join(segments)
+
+
+@dataclass
+class RequestRecord:
+    """Timing and size of one APIClient request, passed to request hooks"""
+    method: str
+    endpoint: str
+    status: int
+    duration: float
+    ttfb: Optional[float] = None
+    request_bytes: int = 0
+    response_bytes: int = 0
+    # Response bytes as transferred, compressed when the server compressed them
+    wire_bytes: int = 0
+    retries: int = 0
+    new_connection: bool = False
+    replayed: bool = False
+    error: Optional[str] = None
+
+
+def _bucket_bounds(start: float, stop: float, factor: float) -> List[float]:
+    bounds = []
+    bound = start
+    while bound < stop:
+        bounds.append(round(bound, 6))
+        bound *= factor
+    bounds.append(stop)
+    return bounds
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with interpolated percentiles
+
+    Bucket bounds grow geometrically from 0.5ms to one minute, which keeps
+    percentile error within one bucket width at a constant memory cost.
+    """
+
+    BOUNDS = _bucket_bounds(0.0005, 60.0, 1.5)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.BOUNDS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the q-th percentile (0-100), interpolated inside its bucket"""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.BOUNDS[index - 1] if index > 0 else 0.0
+                upper = self.BOUNDS[index] if index < len(self.BOUNDS) else self.max
+                value = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(max(value, self.min), self.max)
+            seen += bucket_count
+        return self.max
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Return (le, cumulative count) pairs for Prometheus buckets"""
+        total = 0
+        buckets = []
+        for bound, bucket_count in zip(self.BOUNDS, self.counts):
+            total += bucket_count
+            buckets.append((repr(bound), total))
+        buckets.append(("+Inf", self.count))
+        return buckets
+
+
+class EndpointStats:
+    """Aggregated metrics for one method and endpoint template"""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.ttfb = Histogram()
+        # Latency of requests that had to open a socket (DNS, connect, TLS)
+        self.cold = Histogram()
+        self.statuses: Counter = Counter()
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.wire_bytes = 0
+        self.retries = 0
+        self.new_connections = 0
+        self.errors = 0
+
+    def summary(self) -> Dict:
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "count": self.latency.count,
+            "p50_ms": ms(self.latency.percentile(50)),
+            "p95_ms": ms(self.latency.percentile(95)),
+            "p99_ms": ms(self.latency.percentile(99)),
+            "max_ms": ms(self.latency.max),
+            "mean_ms": ms(self.latency.sum / self.latency.count) if self.latency.count else None,
+            "ttfb_p50_ms": ms(self.ttfb.percentile(50)),
+            "new_connection_p50_ms": ms(self.cold.percentile(50)),
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "response_wire_bytes": self.wire_bytes,
+            "retries": self.retries,
+            "new_connections": self.new_connections,
+            "errors": self.errors
+        }
+
+
+class MetricsRegistry:
+    """Collects RequestRecords per endpoint; use observe() as a request hook"""
+
+    PREFIX = "bookstore_client"
+
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str], EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, record: RequestRecord) -> None:
+        with self._lock:
+            stats = self._stats.get((record.method, record.endpoint))
+            if stats is None:
+                stats = self._stats[(record.method, record.endpoint)] = EndpointStats()
+            stats.latency.observe(record.duration)
+            if record.new_connection:
+                stats.cold.observe(record.duration)
+            if record.ttfb is not None:
+                stats.ttfb.observe(record.ttfb)
+            stats.statuses[record.status] += 1
+            stats.request_bytes += record.request_bytes
+            stats.response_bytes += record.response_bytes
+            stats.wire_bytes += record.wire_bytes
+            stats.retries += record.retries
+            stats.new_connections += record.new_connection
+            stats.errors += record.error is not None
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Return per-endpoint summaries keyed by 'METHOD /template'"""
+        with self._lock:
+            return {
+                f"{method} {endpoint}": stats.summary()
+                for (method, endpoint), stats in sorted(self._stats.items())
+            }
+
+    def to_prometheus(self) -> str:
+        """Render metrics in the Prometheus text exposition format"""
+        prefix = self.PREFIX
+        lines = [
+            f"# HELP {prefix}_request_duration_seconds APIClient request latency",
+            f"# TYPE {prefix}_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            items = sorted(self._stats.items())
+            for (method, endpoint), stats in items:
+                labels = f'method="{method}",endpoint="{endpoint}"'
+                for le, count in stats.latency.cumulative():
+                    lines.append(f'{prefix}_request_duration_seconds_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f"{prefix}_request_duration_seconds_sum{{{labels}}} {stats.latency.sum:.6f}")
+                lines.append(f"{prefix}_request_duration_seconds_count{{{labels}}} {stats.latency.count}")
+
+            counters = [
+                ("requests_total", "Requests by response status", lambda stats: None),
+                ("request_bytes_total", "Request body bytes sent", lambda stats: stats.request_bytes),
+                ("response_bytes_total", "Response body bytes received", lambda stats: stats.response_bytes),
+                ("response_wire_bytes_total", "Response body bytes transferred, before decompression",
+                 lambda stats: stats.wire_bytes),
+                ("retries_total", "Request retries", lambda stats: stats.retries),
+                ("new_connections_total", "Requests that opened a new connection",
+                 lambda stats: stats.new_connections),
+                ("errors_total", "Requests that raised instead of returning", lambda stats: stats.errors),
+            ]
+            for name, help_text, value in counters:
+                lines.append(f"# HELP {prefix}_{name} {help_text}")
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                for (method, endpoint), stats in items:
+                    labels = f'method="{method}",endpoint="{endpoint}"'
+                    if name == "requests_total":
+                        for status, count in sorted(stats.statuses.items()):
+                            lines.append(f'{prefix}_{name}{{{labels},status="{status}"}} {count}')
+                    else:
+                        lines.append(f"{prefix}_{name}{{{labels}}} {value(stats)}")
+        return "\n".join(lines) + "\n"
+
+    def format_table(self) -> str:
+        """Render a p50/p95/p99 table for logs"""
+        rows = [f"{'endpoint':<48} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+        for name, summary in self.snapshot().items():
+            rows.append(
+                f"{name:<48} {summary['count']:>6} {summary['p50_ms'] or 0:>9.2f} "
+                f"{summary['p95_ms'] or 0:>9.2f} {summary['p99_ms'] or 0:>9.2f}"
+            )
+        return "\n".join(rows)
+
+    def write_reports(self, directory: str, name: str = "metrics") -> Tuple[str, str]:
+        """Write <name>.json and <name>.prom into directory"""
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f"{name}.json")
+        prom_path = os.path.join(directory, f"{name}.prom")
+        with open(json_path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        with open(prom_path, "w") as f:
+            f.write(self.to_prometheus())
+        return json_path, prom_path
@@ -0,0 +1,74 @@
+import json
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from src.api.codec import JSONCodec
+
+_UNSET = object()
+
+
+def build_response(status_code: int, body: Any, url: str, headers: Optional[Dict] = None) -> requests.Response:
+    """Build a requests.Response served without touching the network
+
+    `body` may be bytes, a string or a JSON-serializable object.
+    """
+    if isinstance(body, bytes):
+        content = body
+    elif isinstance(body, str):
+        content = body.encode("utf-8")
+    elif body is None:
+        content = b""
+    else:
+        content = json.dumps(body).encode("utf-8")
+
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers.update(headers or {"Content-Type": "application/json; charset=utf-8"})
+    return response
+
+
+class APIResponse:
+    """requests.Response wrapper that decodes the JSON body once
+
+    json() parses the body on first use with the client's codec and then
+    returns the same document, so every step reading the response shares
+    one parse. Treat the document as read-only. Everything else is
+    delegated to the wrapped response.
+    """
+
+    def __init__(self, response: requests.Response, codec=JSONCodec, parsed: Any = _UNSET):
+        self.response = response
+        self.codec = codec
+        self._parsed = parsed
+        self._error: Optional[ValueError] = None
+        # Schema validation results by (schema name, path), see src.api.schema.validate_response
+        self.validations: Dict[Tuple[str, Optional[str]], Any] = {}
+
+    def json(self, **kwargs) -> Any:
+        """Return the parsed body, decoding it on the first call"""
+        if self._parsed is _UNSET and self._error is None:
+            try:
+                self._parsed = self.codec.loads(self.response.content)
+            except ValueError as e:
+                self._error = e
+        if self._error is not None:
+            raise self._error
+        return self._parsed
+
+    @property
+    def parsed(self) -> bool:
+        """Whether the body has already been decoded"""
+        return self._parsed is not _UNSET
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.response, name)
+
+    def __bool__(self) -> bool:
+        return bool(self.response)
+
+    def __repr__(self) -> str:
+        return f"<APIResponse [{self.response.status_code}]>"
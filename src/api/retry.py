@@ -0,0 +1,256 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, FrozenSet, Optional, Tuple
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of sending a request to an endpoint whose circuit is open"""
+
+
+def _not_sent(error: Exception) -> bool:
+    """Whether a request failed before reaching the server"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return the delay in seconds of a Retry-After header (seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryPolicy:
+    """Decides whether and when a failed request is sent again
+
+    Idempotent methods are retried on connection errors and retryable
+    statuses. Other methods are only retried when the request cannot have
+    been processed: a 429, or a failure to connect. Endpoints listed in
+    `safe_endpoints` are treated as idempotent whatever their method.
+    Delays grow exponentially with +/- `jitter`; a Retry-After header
+    takes precedence, capped at `max_retry_after`.
+    """
+
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    # POST endpoints without side effects beyond issuing a token
+    SAFE_ENDPOINTS = frozenset({
+        ("POST", "/Account/v1/Login"),
+        ("POST", "/Account/v1/GenerateToken"),
+        ("POST", "/Account/v1/Authorized"),
+    })
+
+    def __init__(self, max_retries: int = 3, backoff: float = 0.25, max_backoff: float = 8.0,
+                 jitter: float = 0.25, max_retry_after: float = 30.0,
+                 retry_statuses: FrozenSet[int] = RETRY_STATUSES,
+                 idempotent_methods: FrozenSet[str] = IDEMPOTENT_METHODS,
+                 safe_endpoints: FrozenSet[Tuple[str, str]] = SAFE_ENDPOINTS):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = retry_statuses
+        self.idempotent_methods = idempotent_methods
+        self.safe_endpoints = safe_endpoints
+
+    def idempotent(self, method: str, endpoint: str) -> bool:
+        return method in self.idempotent_methods or (method, endpoint) in self.safe_endpoints
+
+    def should_retry(self, method: str, endpoint: str, attempt: int,
+                     response: Optional[requests.Response] = None,
+                     error: Optional[Exception] = None) -> bool:
+        """Whether attempt number `attempt` (0-based) may be followed by another"""
+        if attempt >= self.max_retries:
+            return False
+        if error is not None:
+            if not isinstance(error, (requests.ConnectionError, requests.Timeout)):
+                return False
+            return _not_sent(error) or self.idempotent(method, endpoint)
+        if response is None or response.status_code not in self.retry_statuses:
+            return False
+        return response.status_code == 429 or self.idempotent(method, endpoint)
+
+    def delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Seconds to wait before retry number attempt + 1"""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_after)
+        delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class Throttle:
+    """Token bucket whose rate adapts to the 429s the server sends
+
+    Requests are not limited until the server first answers 429. The rate
+    then starts at half the rate observed over the preceding requests,
+    grows additively by about `increase` requests/s per second of
+    successful traffic up to `max_rate` and is halved again on every
+    further 429, never below `min_rate` (AIMD).
+    One instance is shared by all clients of a process so that they back
+    off together.
+    """
+
+    _shared: Optional["Throttle"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_rate: float = 1000.0, min_rate: float = 1.0, increase: float = 0.5,
+                 decrease: float = 0.5):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        # Requests per second, None while unlimited
+        self.rate: Optional[float] = None
+        self.tokens = 0.0
+        self.throttled = 0
+        self.waited = 0.0
+        self._updated = time.monotonic()
+        self._recent = deque(maxlen=64)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "Throttle":
+        """Return the process-wide throttle"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @property
+    def burst(self) -> float:
+        return max(self.rate / 10, 1.0)
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available; returns the wait"""
+        with self._lock:
+            now = time.monotonic()
+            if self.rate is None:
+                self._recent.append(now)
+                return 0.0
+            self.tokens = min(self.tokens + (now - self._updated) * self.rate, self.burst)
+            self._updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def on_success(self) -> None:
+        if self.rate is None:
+            return
+        with self._lock:
+            self.rate = min(self.rate + self.increase / self.rate, self.max_rate)
+
+    def on_throttled(self) -> None:
+        with self._lock:
+            self.throttled += 1
+            if self.rate is None:
+                span = self._recent[-1] - self._recent[0] if len(self._recent) > 1 else 0
+                observed = (len(self._recent) - 1) / span if span else self.max_rate
+                self.rate = min(observed, self.max_rate)
+                self.tokens = 0.0
+                self._updated = time.monotonic()
+            self.rate = max(self.rate * self.decrease, self.min_rate)
+            self.tokens = min(self.tokens, self.burst)
+        logger.info(f"Server throttled requests, client rate lowered to {self.rate:.1f}/s")
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "rate": round(self.rate, 2) if self.rate is not None else None,
+            "throttled": self.throttled,
+            "waited_s": round(self.waited, 3)
+        }
+
+
+class CircuitBreaker:
+    """Stops sending to an endpoint after consecutive failures
+
+    After `threshold` consecutive server errors or connection failures the
+    circuit opens and requests fail fast with CircuitOpenError. Once
+    `reset_timeout` seconds have passed a single trial request is let
+    through; success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record(self, failed: bool) -> None:
+        with self._lock:
+            if not failed:
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class CircuitBreakers:
+    """Circuit breakers by method and endpoint template"""
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, method: str, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get((method, endpoint))
+            if breaker is None:
+                breaker = self._breakers[(method, endpoint)] = CircuitBreaker(self.threshold, self.reset_timeout)
+            return breaker
+
+    def stats(self) -> Dict[str, str]:
+        """Return the state of every circuit that is not closed"""
+        with self._lock:
+            return {
+                f"{method} {endpoint}": breaker.state
+                for (method, endpoint), breaker in sorted(self._breakers.items())
+                if breaker.state != CircuitBreaker.CLOSED
+            }
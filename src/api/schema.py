@@ -0,0 +1,198 @@
+import re
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.api.metrics import endpoint_template
+
+# ISO 8601 timestamps as returned by the BookStore API, e.g. 2020-06-04T08:48:39.000Z
+TIMESTAMP_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z")
+
+# Checks by type name: (description, predicate)
+_TYPES: Dict[str, Tuple[str, Callable[[Any], bool]]] = {
+    "any": ("any value", lambda value: True),
+    "text": ("a non-empty string", lambda value: isinstance(value, str) and value != ""),
+    "integer": ("an integer", lambda value: isinstance(value, int)),
+    "boolean": ("a boolean", lambda value: isinstance(value, bool)),
+    "list": ("a list", lambda value: isinstance(value, list)),
+    "timestamp": (
+        "a timestamp like 2020-06-04T08:48:39.000Z",
+        lambda value: isinstance(value, str) and TIMESTAMP_PATTERN.search(value) is not None
+    ),
+}
+
+# Declarative schemas: field name -> type name
+BOOK = {
+    "isbn": "text",
+    "title": "text",
+    "subTitle": "text",
+    "author": "text",
+    "publish_date": "timestamp",
+    "publisher": "text",
+    "pages": "integer",
+    "description": "text",
+    "website": "text",
+}
+
+LOGIN = {
+    "userId": "any",
+    "username": "any",
+    "password": "any",
+    "token": "text",
+    "expires": "timestamp",
+    "created_date": "timestamp",
+    "isActive": "boolean",
+}
+
+TOKEN = {
+    "token": "text",
+    "expires": "timestamp",
+    "status": "text",
+    "result": "text",
+}
+
+USER = {
+    "userId": "any",
+    "username": "any",
+    "books": "list",
+}
+
+# Returned by user creation, with a differently cased ID
+CREATED_USER = {
+    "userID": "any",
+    "username": "any",
+    "books": "list",
+}
+
+BOOKS = {
+    "books": "list",
+}
+
+
+class Violation:
+    """One field of one record that failed its check"""
+
+    def __init__(self, index: Optional[int], field: str, message: str):
+        self.index = index
+        self.field = field
+        self.message = message
+
+    def __str__(self) -> str:
+        where = f"[{self.index}]" if self.index is not None else ""
+        return f"{where}.{self.field}: {self.message}"
+
+
+class ValidationResult:
+    """Violations found by one pass of a schema over a list of records"""
+
+    def __init__(self, schema: "Schema", records: Sequence[Dict], violations: List[Violation]):
+        self.schema = schema
+        self.records = records
+        self.violations = violations
+        self._by_field: Dict[str, List[Violation]] = defaultdict(list)
+        for violation in violations:
+            self._by_field[violation.field].append(violation)
+
+    @property
+    def ok(self) -> bool:
+        return not self.violations
+
+    def errors(self, field: str) -> List[Violation]:
+        """Return the violations of one field
+
+        Fields outside the schema are only checked for presence.
+        """
+        if field in self.schema.fields:
+            return self._by_field.get(field, [])
+        return [
+            Violation(index, field, "missing")
+            for index, record in enumerate(self.records)
+            if not isinstance(record, dict) or field not in record
+        ]
+
+    def assert_field(self, field: str) -> None:
+        """Raise AssertionError listing every violation of the field"""
+        self._raise(self.errors(field), f"'{field}'")
+
+    def assert_valid(self) -> None:
+        """Raise AssertionError listing every violation of the schema"""
+        self._raise(self.violations, "schema")
+
+    def _raise(self, violations: List[Violation], subject: str) -> None:
+        if violations:
+            details = "\n".join(f"  {self.schema.name}{violation}" for violation in violations)
+            raise AssertionError(f"{len(violations)} {self.schema.name} {subject} violation(s):\n{details}")
+
+
+class Schema:
+    """Schema compiled into one check per field
+
+    Validation walks every record once and runs all field checks on it,
+    collecting every violation instead of stopping at the first.
+    """
+
+    def __init__(self, name: str, fields: Dict[str, str]):
+        self.name = name
+        self.fields = dict(fields)
+        self._checks = []
+        for field, type_name in self.fields.items():
+            if type_name not in _TYPES:
+                raise ValueError(f"Unknown type {type_name!r} for field {field!r} of {name}")
+            description, predicate = _TYPES[type_name]
+            self._checks.append((field, predicate, f"expected {description}"))
+
+    def validate(self, records: Sequence[Dict], single: bool = False) -> ValidationResult:
+        """Check every field of every record; single marks a lone object"""
+        violations = []
+        for index, record in enumerate(records):
+            position = None if single else index
+            if not isinstance(record, dict):
+                violations.append(Violation(position, "*", f"expected an object, got {type(record).__name__}"))
+                continue
+            for field, predicate, expected in self._checks:
+                if field not in record:
+                    violations.append(Violation(position, field, "missing"))
+                elif not predicate(record[field]):
+                    violations.append(Violation(position, field, f"{expected}, got {record[field]!r}"))
+        return ValidationResult(self, records, violations)
+
+
+BOOK_SCHEMA = Schema("Book", BOOK)
+LOGIN_SCHEMA = Schema("Login", LOGIN)
+TOKEN_SCHEMA = Schema("Token", TOKEN)
+USER_SCHEMA = Schema("User", USER)
+CREATED_USER_SCHEMA = Schema("CreatedUser", CREATED_USER)
+BOOKS_SCHEMA = Schema("Books", BOOKS)
+# Responses of endpoints without a schema are only checked for field presence
+UNKNOWN_SCHEMA = Schema("Response", {})
+
+# Body schema of successful responses by endpoint template
+ENDPOINT_SCHEMAS: Dict[str, Schema] = {
+    "/Account/v1/Login": LOGIN_SCHEMA,
+    "/Account/v1/GenerateToken": TOKEN_SCHEMA,
+    "/Account/v1/User": CREATED_USER_SCHEMA,
+    "/Account/v1/User/{id}": USER_SCHEMA,
+    "/BookStore/v1/Books": BOOKS_SCHEMA,
+    "/BookStore/v1/Book": BOOK_SCHEMA,
+}
+
+
+def schema_for(response) -> Schema:
+    """Return the schema of the endpoint a response came from"""
+    return ENDPOINT_SCHEMAS.get(endpoint_template(response.url), UNKNOWN_SCHEMA)
+
+
+def validate_response(response, schema: Schema, path: Optional[str] = None) -> ValidationResult:
+    """Validate a response's JSON once per schema and path, caching the result
+
+    With path, the records are the list under that key (e.g. "books"),
+    otherwise the response body itself is the single record.
+    """
+    cache = response.validations
+    key = (schema.name, path)
+    if key not in cache:
+        data = response.json()
+        if path is None:
+            cache[key] = schema.validate([data], single=True)
+        else:
+            cache[key] = schema.validate(data[path])
+    return cache[key]
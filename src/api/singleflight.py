@@ -0,0 +1,82 @@
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+class _Call:
+    """One in-flight call and the callers waiting for it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one
+
+    The first caller for a key runs the function; callers arriving with
+    the same key while it runs wait and receive the same result, or the
+    same exception. Nothing is cached once the call has finished. One
+    instance can be shared by several clients.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn once per concurrent key, returning (result, shared)"""
+        with self._lock:
+            self.calls += 1
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict[str, int]:
+        """Return call counters"""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight)
+        }
+
+
+def request_key(method: str, url: str, params: Optional[Dict], headers: Dict,
+                ignore: Iterable[str] = ("authorization",)) -> Tuple:
+    """Identify a request by method, URL, params and auth identity
+
+    The Authorization header is reduced to a hash so that keys never
+    hold tokens; other headers are part of the key as they are.
+    """
+    auth = headers.get("Authorization") or ""
+    identity = hashlib.sha256(auth.encode("utf-8")).hexdigest()[:16] if auth else ""
+    return (
+        method,
+        url,
+        tuple(sorted((name, str(value)) for name, value in (params or {}).items())),
+        tuple(sorted((name.lower(), value) for name, value in headers.items() if name.lower() not in ignore)),
+        identity
+    )
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def parse_expires(value: Optional[str]) -> Optional[datetime]:
+    """Parse the `expires` timestamp returned by Login/GenerateToken"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        logger.warning(f"Unparseable token expiry: {value}")
+        return None
+
+
+class TokenCache:
+    """Tokens and user IDs cached per credential set
+
+    Entries are keyed by a hash of username and password and a token is
+    reused until `margin` before the `expires` timestamp the server
+    returned with it. When `path` is set the cache is persisted as JSON
+    so tokens survive between runs. The file holds live tokens and should
+    be kept out of version control.
+    """
+
+    # Stop reusing a token this long before it expires
+    DEFAULT_MARGIN = timedelta(minutes=5)
+
+    def __init__(self, path: Optional[str] = None, margin: timedelta = DEFAULT_MARGIN):
+        """Initialize token cache"""
+        self.path = path
+        self.margin = margin
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    @staticmethod
+    def key(username: str, password: str) -> str:
+        """Return the cache key for a credential set"""
+        return hashlib.sha256(f"{username}\0{password}".encode()).hexdigest()
+
+    def get(self, username: str, password: str) -> Optional[Dict]:
+        """Return a cached entry with a usable token and user ID, if any"""
+        with self._lock:
+            entry = self._entries.get(self.key(username, password))
+            if entry and entry.get("user_id") and self._is_fresh(entry):
+                self.hits += 1
+                return dict(entry)
+            self.misses += 1
+            return None
+
+    def peek(self, username: str, password: str) -> Dict:
+        """Return whatever is cached for a credential set without counting"""
+        with self._lock:
+            return dict(self._entries.get(self.key(username, password), {}))
+
+    def store(self, username: str, password: str, token: Optional[str] = None,
+              expires: Optional[str] = None, user_id: Optional[str] = None) -> None:
+        """Merge token, expiry and user ID into the entry for a credential set"""
+        with self._lock:
+            entry = self._entries.setdefault(self.key(username, password), {})
+            if token:
+                entry["token"] = token
+                entry["expires"] = expires
+            if user_id:
+                entry["user_id"] = user_id
+            self._save()
+
+    def invalidate(self, username: str, password: str) -> None:
+        """Drop the entry for a credential set"""
+        with self._lock:
+            if self._entries.pop(self.key(username, password), None) is not None:
+                self._save()
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every entry belonging to a user ID"""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry.get("user_id") == user_id]
+            for key in keys:
+                del self._entries[key]
+            if keys:
+                self._save()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters"""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def _is_fresh(self, entry: Dict) -> bool:
+        expires = parse_expires(entry.get("expires"))
+        if not entry.get("token") or expires is None:
+            return False
+        return datetime.now(timezone.utc) < expires - self.margin
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable token cache {self.path}: {e}")
+            self._entries = {}
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".token-cache-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.path)
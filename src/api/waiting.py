@@ -0,0 +1,51 @@
+import logging
+import random
+import time
+from typing import Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WaitTimeout(TimeoutError):
+    """Raised when a readiness condition is not met before the deadline"""
+
+
+def wait_until(probe: Callable[[], Optional[T]], description: str, timeout: float = 10.0,
+               initial_delay: float = 0.1, max_delay: float = 2.0, factor: float = 2.0,
+               jitter: float = 0.25) -> T:
+    """Poll `probe` until it returns a truthy value and return that value
+
+    The first probe runs immediately. Between probes the delay grows by
+    `factor` up to `max_delay`, randomised by +/- `jitter` of itself, and
+    never sleeps past the deadline. Exceptions raised by the probe count
+    as "not ready yet". Every wait logs how long it took.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    delay = initial_delay
+    attempts = 0
+    last_error = None
+    while True:
+        attempts += 1
+        try:
+            result = probe()
+        except Exception as e:
+            result = None
+            last_error = e
+        if result:
+            logger.info(f"Waited {time.monotonic() - started:.3f}s for {description} ({attempts} probes)")
+            return result
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            message = f"Timed out after {timeout}s waiting for {description} ({attempts} probes)"
+            if last_error is not None:
+                message += f": {last_error}"
+            logger.warning(message)
+            raise WaitTimeout(message)
+
+        sleep_for = delay * random.uniform(1 - jitter, 1 + jitter)
+        time.sleep(min(sleep_for, remaining))
+        delay = min(delay * factor, max_delay)
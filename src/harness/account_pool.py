@@ -0,0 +1,153 @@
+"""Pool of pre-provisioned, authenticated test accounts
+
+Creates a set of throwaway users up front, in parallel, and logs each of
+them in so their tokens and user IDs sit in the shared token cache.
+Scenarios lease an account instead of creating or logging in to one
+inline. A released account is reset (its book collection cleared) on a
+background thread and only becomes leasable again once the reset is
+done, so the next scenario starts from a clean, authenticated account.
+"""
+import logging
+import os
+import queue
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import List, Optional
+
+from src.api.api_client import APIClient
+from src.api.token_cache import TokenCache
+from src.harness.clients import ThreadClients
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledAccount:
+    """Credentials and session of one pooled user"""
+    username: str
+    password: str
+    user_id: str = ""
+    token: Optional[str] = None
+
+
+class AccountPool:
+    """Leases pre-provisioned accounts and resets them asynchronously"""
+
+    DEFAULT_PASSWORD = "Pool@12345!"
+    DEFAULT_WORKERS = 4
+
+    def __init__(self, base_url: Optional[str], size: int, token_cache: Optional[TokenCache] = None,
+                 prefix: Optional[str] = None, password: str = DEFAULT_PASSWORD,
+                 workers: int = DEFAULT_WORKERS):
+        """Initialize account pool
+
+        Usernames are prefix plus a counter; the default prefix includes
+        the parallel worker ID and a random suffix so that pools of
+        concurrent runs never collide.
+        """
+        self.base_url = base_url
+        self.size = size
+        self.token_cache = token_cache or TokenCache()
+        worker_id = os.getenv("BEHAVE_WORKER_ID", "0")
+        self.prefix = prefix or f"pool{worker_id}_{uuid.uuid4().hex[:8]}_"
+        self.password = password
+        self.accounts: List[PooledAccount] = []
+        self._ready: "queue.Queue[PooledAccount]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="account-pool")
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._clients = ThreadClients(lambda: APIClient(base_url=self.base_url, token_cache=self.token_cache))
+
+    def provision(self) -> List[PooledAccount]:
+        """Create and authenticate all accounts in parallel"""
+        accounts = [PooledAccount(f"{self.prefix}{index}", self.password) for index in range(self.size)]
+        for future in [self._executor.submit(self._create, account) for account in accounts]:
+            account = future.result()
+            if account is not None:
+                self.accounts.append(account)
+                self._ready.put(account)
+        logger.info(f"Provisioned {len(self.accounts)} of {self.size} pooled accounts")
+        return self.accounts
+
+    def _create(self, account: PooledAccount) -> Optional[PooledAccount]:
+        client = self._clients.get()
+        try:
+            response = client.create_user(account.username, account.password)
+            if response.status_code != 201:
+                logger.warning(f"Failed to create pooled account {account.username}: {response.status_code}")
+                return None
+            self._authenticate(account)
+            return account
+        except Exception as e:
+            logger.warning(f"Failed to provision pooled account {account.username}: {e}")
+            return None
+
+    def _authenticate(self, account: PooledAccount) -> None:
+        session = self._clients.get().authenticate(account.username, account.password)
+        account.token = session.get("token")
+        account.user_id = session.get("user_id") or ""
+
+    def lease(self, timeout: Optional[float] = 30) -> PooledAccount:
+        """Take a ready account, waiting for a reset to finish if none is free"""
+        if not self.accounts:
+            raise LookupError("Account pool is empty")
+        try:
+            account = self._ready.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No pooled account became free within {timeout}s") from None
+        # Tokens outlive a run, but refresh one that is about to expire
+        if self.token_cache.get(account.username, account.password) is None:
+            self._authenticate(account)
+        logger.info(f"Leased pooled account {account.username}")
+        return account
+
+    def release(self, account: PooledAccount) -> None:
+        """Return an account; it is reset in the background before reuse"""
+        future = self._executor.submit(self._reset, account)
+        with self._pending_lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard_pending)
+
+    def _discard_pending(self, future) -> None:
+        with self._pending_lock:
+            self._pending.discard(future)
+
+    def _reset(self, account: PooledAccount) -> None:
+        client = self._clients.get()
+        try:
+            self._authenticate(account)
+            client.set_token(account.token)
+            response = client.clear_collection(account.user_id)
+            if response.status_code not in (200, 204):
+                raise RuntimeError(f"clearing collection returned {response.status_code}")
+        except Exception as e:
+            logger.warning(f"Dropping pooled account {account.username}, reset failed: {e}")
+            return
+        self._ready.put(account)
+
+    def drain(self, timeout: Optional[float] = None) -> None:
+        """Wait for pending resets"""
+        with self._pending_lock:
+            pending = list(self._pending)
+        wait(pending, timeout=timeout)
+
+    def close(self, delete: bool = True) -> None:
+        """Finish resets, delete the pooled users and release connections"""
+        self.drain()
+        if delete:
+            futures = [self._executor.submit(self._delete, account) for account in self.accounts]
+            wait(futures)
+        self._executor.shutdown(wait=True)
+        self._clients.close()
+
+    def _delete(self, account: PooledAccount) -> None:
+        client = self._clients.get()
+        try:
+            self._authenticate(account)
+            client.set_token(account.token)
+            client.delete_user(account.user_id)
+            self.token_cache.invalidate(account.username, account.password)
+        except Exception as e:
+            logger.warning(f"Failed to delete pooled account {account.username}: {e}")
@@ -0,0 +1,8 @@
+"""Accounts named in step text
+
+Kept free of heavy imports: the behave environment loads it at startup.
+"""
+import re
+
+# Step text naming the account a scenario acts on
+ACCOUNT_PATTERN = re.compile(r'username "([^"]+)"')
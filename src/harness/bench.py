@@ -0,0 +1,444 @@
+"""Load generation and benchmarking with the feature-file flows
+
+Replays scenarios of the .feature files as weighted workloads. Each
+iteration picks a scenario by weight and runs its steps through the
+regular step definitions on a per-thread APIClient. Every thread works
+on its own accounts: a pooled default account, a pooled copy of each
+existing account the scenarios log in to, and its own name for users
+the scenarios create. Runs at a fixed concurrency, optionally paced to a
+target rate of scenario starts, and reports throughput, latency
+percentiles, error rates and client CPU time per request.
+
+Usage:
+    python -m src.harness.bench --stub --concurrency 8 --duration 30 \\
+        --tags @GET_Books,@GET_Books_isbn --weight @GET_Books=3
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Set, Tuple
+
+from behave.parser import parse_file
+from behave.step_registry import registry
+
+from src.api.api_client import APIClient
+from src.api.metrics import Histogram, MetricsRegistry
+from src.api.singleflight import SingleFlight
+from src.api.token_cache import TokenCache
+from src.harness.account_pool import AccountPool, PooledAccount
+from src.harness.stub_server import StubServer
+
+logger = logging.getLogger(__name__)
+
+STEP_MODULES = [
+    "features.steps.common_steps",
+    "features.steps.account_steps",
+    "features.steps.bookstore_steps",
+]
+
+# Accounts named in step text: logged in to, or created by the scenario
+LOGIN_PATTERN = re.compile(r'username "([^"]+)" password "([^"]+)"')
+CREATE_PATTERN = re.compile(r'create user with username "([^"]+)"')
+
+
+class Workload:
+    """A scenario replayed as one benchmark iteration"""
+
+    def __init__(self, scenario, weight: float):
+        self.name = scenario.name
+        self.tags = list(scenario.effective_tags)
+        self.steps = list(scenario.all_steps)
+        self.weight = weight
+        self.latency = Histogram()
+        self.errors: Counter = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, duration: float, error: Optional[str]) -> None:
+        with self.lock:
+            self.latency.observe(duration)
+            if error:
+                self.errors[error] += 1
+
+
+def load_workloads(paths: List[str], tags: List[str], weights: Dict[str, float]) -> List[Workload]:
+    """Parse feature files into workloads, filtered by tag and weighted"""
+    feature_files = []
+    for path in paths:
+        path = Path(path)
+        feature_files.extend(sorted(path.rglob("*.feature")) if path.is_dir() else [path])
+
+    workloads = []
+    for filename in feature_files:
+        feature = parse_file(str(filename))
+        for scenario in feature.walk_scenarios():
+            scenario_tags = {f"@{tag}" for tag in scenario.effective_tags}
+            if tags and not scenario_tags & set(tags):
+                continue
+            weight = max((weights[tag] for tag in scenario_tags if tag in weights), default=1.0)
+            if weight > 0:
+                workloads.append(Workload(scenario, weight))
+    return workloads
+
+
+def load_steps() -> None:
+    """Register the step definitions with behave's global registry"""
+    for module in STEP_MODULES:
+        importlib.import_module(module)
+
+
+def account_names(workloads: List[Workload]) -> tuple:
+    """Accounts named in the workloads: (existing username -> password, created usernames)
+
+    Existing accounts are shared and get a pooled copy per thread;
+    accounts a workload creates get a fresh name per creation.
+    """
+    created = {name for workload in workloads for step in workload.steps for name in CREATE_PATTERN.findall(step.name)}
+    shared = {
+        username: password
+        for workload in workloads for step in workload.steps
+        for username, password in LOGIN_PATTERN.findall(step.name)
+        if username not in created
+    }
+    return shared, created
+
+
+class ThreadAccounts:
+    """The accounts one benchmark thread uses in place of shared ones"""
+
+    def __init__(self, default: PooledAccount, prefix: str, created_names: Set[str]):
+        self.default = default
+        self.prefix = prefix
+        self.created_names = created_names
+        # Shared username -> (username, password) of this thread's copy
+        self.aliases: Dict[str, Tuple[str, str]] = {}
+        # Shared user ID -> this thread's user ID, for steps asserting on IDs
+        self.user_ids: Dict[str, str] = {}
+        # Created username -> this thread's live (username, password) users, newest last
+        self.live: Dict[str, List[Tuple[str, str]]] = {}
+        self._serial = 0
+
+    def alias(self, username: str, account: PooledAccount, user_id: str) -> None:
+        self.aliases[username] = (account.username, account.password)
+        if user_id:
+            self.user_ids[user_id] = account.user_id
+
+    def _new_name(self, username: str) -> str:
+        self._serial += 1
+        return f"{self.prefix}{username}_{self._serial}"
+
+    def prepare(self, workload: Workload, api: APIClient) -> None:
+        """Create the users a workload logs in to without creating them first"""
+        creates = set()
+        for step in workload.steps:
+            creates.update(CREATE_PATTERN.findall(step.name))
+            for username, password in LOGIN_PATTERN.findall(step.name):
+                if username in self.created_names and username not in creates and not self.live.get(username):
+                    name = self._new_name(username)
+                    if api.create_user(name, password).status_code == 201:
+                        self.live.setdefault(username, []).append((name, password))
+
+    def localize(self, step, kwargs: Dict[str, str]) -> Dict[str, str]:
+        """Point the arguments of a step at this thread's accounts"""
+        kwargs = {name: self.user_ids.get(value, value) for name, value in kwargs.items()}
+        username = kwargs.get("username")
+        if username in self.aliases:
+            kwargs["username"], kwargs["password"] = self.aliases[username]
+        elif username in self.created_names:
+            if CREATE_PATTERN.search(step.name):
+                kwargs["username"] = self._new_name(username)
+                self.live.setdefault(username, []).append((kwargs["username"], kwargs["password"]))
+            elif self.live.get(username):
+                kwargs["username"], kwargs["password"] = self.live[username][-1]
+        return kwargs
+
+    def finish(self, workload: Workload) -> None:
+        """Forget users the workload deleted"""
+        if "DELETE_User" not in workload.tags:
+            return
+        for step in workload.steps:
+            for username, _ in LOGIN_PATTERN.findall(step.name):
+                if self.live.get(username):
+                    self.live[username].pop()
+
+
+def new_context(api: APIClient, accounts: ThreadAccounts) -> SimpleNamespace:
+    """Build the attributes the step definitions expect on behave's context"""
+    return SimpleNamespace(
+        api=api,
+        accounts=None,
+        lease=None,
+        response=None,
+        error=None,
+        thread_accounts=accounts,
+        test_data={}
+    )
+
+
+def run_iteration(workload: Workload, context: SimpleNamespace) -> None:
+    """Run the steps of one scenario, then undo collection changes"""
+    # Start from the thread's defaults, as before_scenario does
+    default = context.thread_accounts.default
+    context.test_data = {"username": default.username, "password": default.password, "user_id": "", "isbn": ""}
+    context.api.set_token(None)
+    context.response = None
+    context.thread_accounts.prepare(workload, context.api)
+    started = time.perf_counter()
+    error = None
+    try:
+        for step in workload.steps:
+            match = registry.find_match(step)
+            if match is None:
+                raise LookupError(f"Undefined step: {step.keyword} {step.name}")
+            args = [arg.value for arg in match.arguments if arg.name is None]
+            kwargs = {arg.name: arg.value for arg in match.arguments if arg.name is not None}
+            match.func(context, *args, **context.thread_accounts.localize(step, kwargs))
+    except AssertionError as e:
+        error = f"AssertionError: {str(e).splitlines()[0] if str(e) else ''}"[:120]
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"[:120]
+    workload.record(time.perf_counter() - started, error)
+    context.thread_accounts.finish(workload)
+
+    if "POST_Books" in workload.tags and context.test_data.get("user_id"):
+        try:
+            context.api.clear_collection(context.test_data["user_id"])
+        except Exception as e:
+            logger.warning(f"Failed to cleanup books: {e}")
+
+
+def delete_created(api: APIClient, accounts: ThreadAccounts) -> None:
+    """Delete users the thread's iterations created and left behind"""
+    for users in accounts.live.values():
+        for username, password in users:
+            try:
+                session = api.authenticate(username, password)
+            except Exception:
+                continue
+            if session.get("token") and session.get("user_id"):
+                api.set_token(session["token"])
+                api.delete_user(session["user_id"])
+
+
+class Pacer:
+    """Spaces iteration starts to reach a target rate across all threads"""
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1 / rate if rate else 0
+        self.next_start = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self.lock:
+            start = max(self.next_start, time.perf_counter())
+            self.next_start = start + self.interval
+        delay = start - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def provision_accounts(workloads: List[Workload], base_url: str, concurrency: int,
+                       token_cache: TokenCache) -> tuple:
+    """Create the per-thread accounts; returns (pools, thread accounts)"""
+    pools = [AccountPool(base_url, concurrency, token_cache=token_cache, prefix=f"bench_{os.getpid()}_")]
+    shared, created = account_names(workloads)
+    # The shared accounts' own IDs, so that steps asserting on them can be redirected
+    user_ids = {}
+    with APIClient(base_url=base_url, token_cache=token_cache) as api:
+        for username, password in shared.items():
+            user_ids[username] = api.authenticate(username, password).get("user_id") or ""
+            pools.append(AccountPool(
+                base_url, concurrency, token_cache=token_cache, prefix=f"bench_{os.getpid()}_{username}_",
+                password=password
+            ))
+    for pool in pools:
+        if len(pool.provision()) < concurrency:
+            raise RuntimeError(f"Could only provision {len(pool.accounts)} of {concurrency} accounts {pool.prefix}*")
+
+    accounts = []
+    for index in range(concurrency):
+        thread_accounts = ThreadAccounts(pools[0].lease(), f"bench_{os.getpid()}_t{index}_", created)
+        for pool, username in zip(pools[1:], shared):
+            thread_accounts.alias(username, pool.lease(), user_ids[username])
+        accounts.append(thread_accounts)
+    return pools, accounts
+
+
+def run_benchmark(workloads: List[Workload], base_url: str, concurrency: int, duration: Optional[float],
+                  iterations: Optional[int], rate: Optional[float], cold: bool = False) -> Dict:
+    """Drive the workloads and return the report"""
+    metrics = MetricsRegistry()
+    token_cache = TokenCache()
+    pools, thread_accounts = provision_accounts(workloads, base_url, concurrency, token_cache)
+    # Shared by all thread clients so identical concurrent GETs go out once
+    single_flight = None if cold else SingleFlight()
+    pacer = Pacer(rate)
+    weights = [workload.weight for workload in workloads]
+    remaining = [iterations] if iterations else None
+    remaining_lock = threading.Lock()
+    deadline = time.perf_counter() + duration if duration else None
+
+    def claim() -> bool:
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        if remaining is not None:
+            with remaining_lock:
+                if remaining[0] <= 0:
+                    return False
+                remaining[0] -= 1
+        return True
+
+    cpu_times = []
+
+    def worker(seed: int) -> None:
+        # Per-thread CPU time excludes an in-process stub server
+        cpu_started = time.thread_time()
+        chooser = random.Random(seed)
+        with APIClient(base_url=base_url, token_cache=token_cache, single_flight=single_flight) as api:
+            api.single_flight = single_flight  # None in cold mode: no coalescing at all
+            api.add_request_hook(metrics.observe)
+            api.catalog.bypass = cold
+            context = new_context(api, thread_accounts[seed])
+            while claim():
+                pacer.wait()
+                if cold:
+                    api.token_cache = TokenCache()
+                run_iteration(chooser.choices(workloads, weights)[0], context)
+            cpu_times.append(time.thread_time() - cpu_started)
+            delete_created(api, thread_accounts[seed])
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(concurrency)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        for pool in pools:
+            pool.close()
+    cpu = sum(cpu_times)
+
+    endpoints = metrics.snapshot()
+    total_requests = sum(summary["count"] for summary in endpoints.values())
+    total_iterations = sum(workload.latency.count for workload in workloads)
+    total_errors = sum(sum(workload.errors.values()) for workload in workloads)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 3)
+
+    return {
+        "base_url": base_url,
+        "concurrency": concurrency,
+        "target_rate": rate,
+        "elapsed_s": round(elapsed, 3),
+        "iterations": total_iterations,
+        "iterations_per_s": round(total_iterations / elapsed, 2) if elapsed else None,
+        "requests": total_requests,
+        "requests_per_s": round(total_requests / elapsed, 2) if elapsed else None,
+        "error_rate": round(total_errors / total_iterations, 4) if total_iterations else None,
+        "cpu_s": round(cpu, 3),
+        "cpu_ms_per_request": round(cpu * 1000 / total_requests, 3) if total_requests else None,
+        "coalesced_gets": single_flight.coalesced if single_flight else 0,
+        "workloads": {
+            workload.name: {
+                "weight": workload.weight,
+                "iterations": workload.latency.count,
+                "p50_ms": ms(workload.latency.percentile(50)),
+                "p95_ms": ms(workload.latency.percentile(95)),
+                "p99_ms": ms(workload.latency.percentile(99)),
+                "errors": dict(workload.errors)
+            }
+            for workload in workloads
+        },
+        "endpoints": endpoints
+    }
+
+
+def format_report(report: Dict) -> str:
+    """Render the headline numbers and per-workload table"""
+    lines = [
+        f"{report['iterations']} iterations, {report['requests']} requests in {report['elapsed_s']}s "
+        f"({report['iterations_per_s']} it/s, {report['requests_per_s']} req/s)",
+        f"error rate {report['error_rate']}, client CPU {report['cpu_ms_per_request']} ms/request",
+        f"{'workload':<40} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}",
+    ]
+    for name, summary in report["workloads"].items():
+        lines.append(
+            f"{name:<40} {summary['iterations']:>6} {summary['p50_ms'] or 0:>9.2f} "
+            f"{summary['p95_ms'] or 0:>9.2f} {summary['p99_ms'] or 0:>9.2f} {sum(summary['errors'].values()):>7}"
+        )
+    return "\n".join(lines)
+
+
+def parse_weights(values: List[str]) -> Dict[str, float]:
+    weights = {}
+    for value in values:
+        tag, _, weight = value.partition("=")
+        weights[tag if tag.startswith("@") else f"@{tag}"] = float(weight or 1)
+    return weights
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark APIClient with the feature-file flows")
+    parser.add_argument("paths", nargs="*", default=["features"], help="Feature files or directories")
+    parser.add_argument("--tags", default="", help="Comma-separated tags of scenarios to include")
+    parser.add_argument("--weight", action="append", default=[], help="TAG=WEIGHT, repeatable")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, help="Seconds to run")
+    parser.add_argument("--iterations", type=int, help="Total scenario iterations to run")
+    parser.add_argument("--rate", type=float, help="Target scenario starts per second")
+    parser.add_argument("--base-url", default=os.getenv("API_BASE_URL"))
+    parser.add_argument("--stub", action="store_true", help="Run against an in-process stub server")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0)
+    parser.add_argument("--cold", action="store_true", help="Disable caches and GET coalescing")
+    parser.add_argument("--output", default="reports/bench.json")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    if not args.duration and not args.iterations:
+        args.duration = 10.0
+
+    tags = [tag if tag.startswith("@") else f"@{tag}" for tag in args.tags.split(",") if tag]
+    workloads = load_workloads(args.paths, tags, parse_weights(args.weight))
+    if not workloads:
+        parser.error("no scenarios match the given tags")
+    load_steps()
+
+    stub = None
+    base_url = args.base_url
+    if args.stub:
+        stub = StubServer(latency=args.stub_latency_ms / 1000).start()
+        base_url = stub.base_url
+
+    try:
+        report = run_benchmark(
+            workloads, base_url or APIClient.DEFAULT_BASE_URL, args.concurrency, args.duration,
+            args.iterations, args.rate, args.cold
+        )
+    finally:
+        if stub is not None:
+            stub.stop()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(format_report(report))
+    print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Background teardown for the behave harness
+
+after_scenario enqueues cleanup actions (deleting users, clearing
+collections) instead of running them inline. A small thread pool works
+through them, each thread on its own APIClient whose retry policy
+retries transient failures. A scenario only waits for pending cleanup
+of the accounts it touches; everything else overlaps with the following
+scenarios. The queue is drained with a deadline in after_all.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from src.api.api_client import APIClient
+from src.api.cassette import Cassette
+from src.api.retry import RetryPolicy
+from src.api.token_cache import TokenCache
+from src.harness.clients import ThreadClients
+
+logger = logging.getLogger(__name__)
+
+class CleanupQueue:
+    """Runs teardown actions on background threads, keyed by resource"""
+
+    DEFAULT_WORKERS = 4
+    DEFAULT_RETRIES = 3
+    DEFAULT_BACKOFF = 0.2
+
+    def __init__(self, base_url: Optional[str], token_cache: Optional[TokenCache] = None,
+                 workers: int = DEFAULT_WORKERS, retries: int = DEFAULT_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF,
+                 request_hooks: Iterable[Callable] = (),
+                 cassette: Optional[Cassette] = None):
+        """Initialize cleanup queue
+
+        Requests of an action are retried up to `retries` times by the
+        worker client's RetryPolicy, which backs off from `backoff`
+        seconds; the action itself runs once. request_hooks are registered on every
+        worker client so cleanup traffic still shows up in metrics. Worker
+        clients share cassette, so cleanup is recorded and replayed with
+        the rest of the run's traffic; the queue does not close it.
+        """
+        self.base_url = base_url
+        self.token_cache = token_cache or TokenCache()
+        self.retry_policy = RetryPolicy(max_retries=retries, backoff=backoff)
+        self.request_hooks = list(request_hooks)
+        self.cassette = cassette
+        self.completed = 0
+        self.failed = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cleanup")
+        self._pending: Dict[str, Set[Future]] = {}
+        self._lock = threading.Lock()
+        self._clients = ThreadClients(self._new_client)
+
+    def _new_client(self) -> APIClient:
+        client = APIClient(
+            base_url=self.base_url, token_cache=self.token_cache, cassette=self.cassette,
+            retry_policy=self.retry_policy
+        )
+        for hook in self.request_hooks:
+            client.add_request_hook(hook)
+        return client
+
+    def submit(self, resource: str, description: str, action: Callable[[APIClient], object],
+               token: Optional[str] = None) -> Future:
+        """Queue action(client) for resource, authenticated with token
+
+        An action may return a response; any status other than 2xx
+        counts as a failed action.
+        """
+        future = self._executor.submit(self._run, description, action, token)
+        with self._lock:
+            self._pending.setdefault(resource, set()).add(future)
+        future.add_done_callback(lambda done: self._discard(resource, done))
+        return future
+
+    def _discard(self, resource: str, future: Future) -> None:
+        with self._lock:
+            pending = self._pending.get(resource)
+            if pending is not None:
+                pending.discard(future)
+                if not pending:
+                    del self._pending[resource]
+
+    def _run(self, description: str, action: Callable[[APIClient], object], token: Optional[str]) -> None:
+        client = self._clients.get()
+        client.set_token(token)
+        try:
+            response = action(client)
+            status = getattr(response, "status_code", None)
+            if status is None or 200 <= status < 300:
+                logger.info(f"Cleanup done: {description}" + (f" ({status})" if status else ""))
+                with self._lock:
+                    self.completed += 1
+                return
+            error = f"status {status}"
+        except Exception as e:
+            error = repr(e)
+        logger.warning(f"Cleanup failed for {description}: {error}")
+        with self._lock:
+            self.failed += 1
+
+    def pending(self, resource: Optional[str] = None) -> int:
+        """Return the number of queued or running actions"""
+        with self._lock:
+            if resource is not None:
+                return len(self._pending.get(resource, ()))
+            return sum(len(futures) for futures in self._pending.values())
+
+    def wait_for(self, *resources: str, timeout: Optional[float] = None) -> None:
+        """Block until pending cleanup of the given resources has finished"""
+        with self._lock:
+            futures = [future for resource in resources for future in self._pending.get(resource, ())]
+        if futures:
+            started = time.perf_counter()
+            wait(futures, timeout=timeout)
+            logger.info(f"Waited {time.perf_counter() - started:.3f}s for cleanup of {', '.join(resources)}")
+
+    def drain(self, timeout: Optional[float] = None) -> int:
+        """Finish queued cleanup within timeout and return the actions abandoned"""
+        with self._lock:
+            futures = [future for pending in self._pending.values() for future in pending]
+        _, not_done = wait(futures, timeout=timeout)
+        for future in not_done:
+            future.cancel()
+        self._executor.shutdown(wait=False)
+        if not_done:
+            # Running actions keep their clients until they finish
+            logger.warning(f"Abandoned {len(not_done)} cleanup actions after {timeout}s")
+            return len(not_done)
+        self._clients.close()
+        return 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return cleanup counters"""
+        return {"completed": self.completed, "failed": self.failed, "pending": self.pending()}
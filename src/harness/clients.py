@@ -0,0 +1,35 @@
+"""Per-thread API clients for the harness' background thread pools"""
+import threading
+from typing import Callable, List
+
+from src.api.api_client import APIClient
+
+
+class ThreadClients:
+    """One APIClient per calling thread, built on first use
+
+    Tokens are per client, so threads working for different accounts
+    must not share one. close() closes every client built so far.
+    """
+
+    def __init__(self, factory: Callable[[], APIClient]):
+        self.factory = factory
+        self._local = threading.local()
+        self._clients: List[APIClient] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> APIClient:
+        """Return the calling thread's client"""
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self.factory()
+            self._local.client = client
+            with self._lock:
+                self._clients.append(client)
+        return client
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._clients:
+                client.close()
+            self._clients.clear()
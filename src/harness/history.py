@@ -0,0 +1,100 @@
+"""Duration history of scenarios and steps
+
+The behave hooks record how long every scenario and step took. Durations
+are kept as exponentially weighted moving averages in a compact JSON
+file, so a single slow run does not dominate. The parallel runner reads
+the history to schedule the slowest scenarios first and to balance its
+shards by expected duration rather than scenario count.
+"""
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+DEFAULT_PATH = "reports/durations.json"
+
+
+def scenario_key(filename: str, name: str) -> str:
+    """Identify a scenario by feature file and name, which survive line shifts"""
+    return f"{os.path.normpath(filename)}::{name}"
+
+
+class DurationHistory:
+    """Moving averages of scenario and step durations, persisted as JSON
+
+    Layout: {"scenarios": {key: [mean_s, runs]}, "steps": {text: [mean_s, runs]}}.
+    """
+
+    # Weight of the newest sample in the moving average
+    ALPHA = 0.3
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.scenarios: Dict[str, list] = {}
+        self.steps: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def _load(self, path: str) -> None:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.scenarios.update(data.get("scenarios", {}))
+        self.steps.update(data.get("steps", {}))
+
+    @classmethod
+    def _observe(cls, table: Dict[str, list], key: str, duration: float) -> None:
+        entry = table.get(key)
+        if entry is None:
+            table[key] = [round(duration, 4), 1]
+        else:
+            entry[0] = round(entry[0] + cls.ALPHA * (duration - entry[0]), 4)
+            entry[1] += 1
+
+    def record_scenario(self, filename: str, name: str, duration: float) -> None:
+        with self._lock:
+            self._observe(self.scenarios, scenario_key(filename, name), duration)
+
+    def record_step(self, text: str, duration: float) -> None:
+        with self._lock:
+            self._observe(self.steps, text, duration)
+
+    def estimate(self, filename: str, name: str, default: Optional[float] = None) -> Optional[float]:
+        """Return the expected duration of a scenario, or default when unknown"""
+        entry = self.scenarios.get(scenario_key(filename, name))
+        return entry[0] if entry else default
+
+    def typical(self) -> float:
+        """Median known scenario duration, used for scenarios without history"""
+        durations = sorted(entry[0] for entry in self.scenarios.values())
+        return durations[len(durations) // 2] if durations else 1.0
+
+    def merge(self, paths: Iterable[str]) -> None:
+        """Fold the samples of other history files into this one
+
+        Worker processes keep their own files; each worker's averages are
+        merged as one sample per key.
+        """
+        for path in paths:
+            other = DurationHistory(path)
+            with self._lock:
+                for table, other_table in ((self.scenarios, other.scenarios), (self.steps, other.steps)):
+                    for key, (mean, _) in other_table.items():
+                        self._observe(table, key, mean)
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write the history atomically"""
+        path = path or self.path
+        if not path:
+            return
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {"scenarios": dict(sorted(self.scenarios.items())), "steps": dict(sorted(self.steps.items()))}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
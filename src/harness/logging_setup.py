@@ -0,0 +1,164 @@
+"""Logging configuration for the behave harness
+
+Handlers that touch the disk or the console run on a background
+QueueListener thread. Loggers only enqueue records, so writing a log line
+never blocks a step on file or terminal I/O.
+
+In buffered mode the records of each scenario are held in a bounded
+in-memory ring instead. A failed scenario flushes its whole ring,
+including debug detail such as response bodies; a passing one leaves a
+single summary line. Log files are rotated and gzipped at the start of
+every run, keeping the last `backups` runs.
+"""
+import atexit
+import gzip
+import logging
+import os
+import queue
+import shutil
+import sys
+import threading
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener: Optional[QueueListener] = None
+_buffer: Optional["ScenarioLogBuffer"] = None
+
+
+class ScenarioLogBuffer(logging.Handler):
+    """Holds a scenario's records in a ring and forwards them only on failure
+
+    Only records logged by the thread that began the scenario are held;
+    records of background threads, and all records outside a scenario,
+    are forwarded when they reach `level`.
+    """
+
+    def __init__(self, target: logging.Handler, level: int = logging.INFO, capacity: int = 1000):
+        super().__init__(logging.NOTSET)
+        self.target = target
+        self.forward_level = level
+        self.capacity = capacity
+        self.records = deque(maxlen=capacity)
+        self.seen = 0
+        self.scenario: Optional[str] = None
+        self._thread: Optional[int] = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.scenario is not None and record.thread == self._thread:
+            self.records.append(record)
+            self.seen += 1
+        elif record.levelno >= self.forward_level:
+            self.target.handle(record)
+
+    def begin(self, name: str) -> None:
+        self.records.clear()
+        self.seen = 0
+        self.scenario = name
+        self._thread = threading.get_ident()
+
+    def end(self, failed: bool, duration: Optional[float] = None) -> None:
+        """Flush the ring of a failed scenario, or log a one-line summary"""
+        name, self.scenario = self.scenario, None
+        if name is None:
+            return
+        took = f" in {duration:.3f}s" if duration is not None else ""
+        logger = logging.getLogger(__name__)
+        if failed:
+            dropped = self.seen - len(self.records)
+            header = f"Scenario failed{took}: {name}, replaying {len(self.records)} log records"
+            if dropped:
+                header += f" ({dropped} older records dropped)"
+            self.target.handle(logger.makeRecord(logger.name, logging.ERROR, __file__, 0, header, (), None))
+            for record in self.records:
+                self.target.handle(record)
+        else:
+            summary = f"Scenario passed{took}: {name} ({self.seen} log records)"
+            self.target.handle(logger.makeRecord(logger.name, logging.INFO, __file__, 0, summary, (), None))
+        self.records.clear()
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def _run_file_handler(log_file: str, backups: int) -> logging.FileHandler:
+    """Return a handler on a fresh log file, gzipping the previous runs' files"""
+    if backups <= 0:
+        return logging.FileHandler(log_file)
+    handler = RotatingFileHandler(log_file, backupCount=backups)
+    handler.namer = lambda name: f"{name}.gz"
+    handler.rotator = _gzip_rotator
+    if os.path.exists(log_file) and os.path.getsize(log_file) > 0:
+        handler.doRollover()
+    return handler
+
+
+def configure_logging(log_file: str = 'test.log', level: int = logging.INFO, buffered: bool = False,
+                      buffer_size: int = 1000, backups: int = 5) -> QueueListener:
+    """Route root logging through a queue to a file and stdout
+
+    With buffered=True, records of each scenario go through a
+    ScenarioLogBuffer; the client loggers then log at DEBUG so that a
+    failure shows full detail.
+    """
+    global _listener, _buffer
+    stop_logging()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = _run_file_handler(log_file, backups)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    queue_handler = QueueHandler(log_queue)
+    if buffered:
+        _buffer = ScenarioLogBuffer(queue_handler, level, buffer_size)
+        root.addHandler(_buffer)
+        # Capture debug detail of our own modules whatever the root level
+        logging.getLogger("src").setLevel(logging.DEBUG)
+    else:
+        root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def begin_scenario(name: str) -> None:
+    """Start buffering a scenario's records, when buffered"""
+    if _buffer is not None:
+        _buffer.begin(name)
+
+
+def end_scenario(failed: bool, duration: Optional[float] = None) -> None:
+    """Flush or summarize the scenario's records, when buffered"""
+    if _buffer is not None:
+        _buffer.end(failed, duration)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener, _buffer
+    if _buffer is not None:
+        logging.getLogger().removeHandler(_buffer)
+        logging.getLogger("src").setLevel(logging.NOTSET)
+        _buffer = None
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(stop_logging)
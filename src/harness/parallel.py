@@ -0,0 +1,330 @@
+"""Parallel scenario runner
+
+Spreads the scenarios of the feature files across worker processes. Each
+worker is a separate `behave` process with its own APIClient, credential
+set and log file. Scenarios that act on the same account, or carry tags
+that conflict such as @POST_User and @DELETE_User, are kept in one group
+which always runs in a single worker, in file order, so they never run
+concurrently. Groups are balanced across workers by the durations
+recorded in the duration history, slowest first.
+
+Usage:
+    python -m src.harness.parallel --workers 4 --accounts accounts.json features/
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from behave.parser import parse_file
+
+from src.harness.accounts import ACCOUNT_PATTERN
+from src.harness.history import DEFAULT_PATH as DEFAULT_HISTORY_PATH, DurationHistory
+
+# Tags whose scenarios depend on each other and must share a worker
+CONFLICT_TAGS = [
+    # DELETE_User removes the user POST_User creates
+    {"POST_User", "DELETE_User"},
+    # Both change the collection of the worker's account unless accounts are pooled
+    {"POST_Books", "DELETE_Books"},
+]
+
+
+@dataclass
+class ScenarioRef:
+    """A scenario addressed by its feature file location"""
+    filename: str
+    line: int
+    name: str
+    tags: List[str] = field(default_factory=list)
+    accounts: List[str] = field(default_factory=list)
+    # Expected seconds, from the duration history
+    duration: float = 1.0
+
+    @property
+    def location(self) -> str:
+        return f"{self.filename}:{self.line}"
+
+    @property
+    def resources(self) -> List[str]:
+        """Accounts and conflict sets this scenario must not share with another worker"""
+        conflicts = [f"tags:{index}" for index, tags in enumerate(CONFLICT_TAGS) if tags & set(self.tags)]
+        return self.accounts + conflicts
+
+
+@dataclass
+class ScenarioGroup:
+    """Scenarios that must run serially in the same worker"""
+    scenarios: List[ScenarioRef] = field(default_factory=list)
+
+    @property
+    def accounts(self) -> List[str]:
+        return sorted({account for scenario in self.scenarios for account in scenario.accounts})
+
+    @property
+    def resources(self) -> List[str]:
+        return sorted({resource for scenario in self.scenarios for resource in scenario.resources})
+
+    @property
+    def duration(self) -> float:
+        return sum(scenario.duration for scenario in self.scenarios)
+
+
+def discover_scenarios(paths: List[str]) -> List[ScenarioRef]:
+    """Parse feature files and return their scenarios in file order"""
+    feature_files = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            feature_files.extend(sorted(path.rglob("*.feature")))
+        else:
+            feature_files.append(path)
+
+    scenarios = []
+    for filename in feature_files:
+        feature = parse_file(str(filename))
+        if feature is None:
+            continue
+        for scenario in feature.walk_scenarios():
+            steps = list(feature.background.steps if feature.background else []) + list(scenario.steps)
+            accounts = []
+            for step in steps:
+                for account in ACCOUNT_PATTERN.findall(step.name):
+                    if account not in accounts:
+                        accounts.append(account)
+            scenarios.append(ScenarioRef(
+                filename=str(filename),
+                line=scenario.line,
+                name=scenario.name,
+                tags=list(scenario.effective_tags),
+                accounts=accounts
+            ))
+    return scenarios
+
+
+def group_by_account(scenarios: List[ScenarioRef]) -> List[ScenarioGroup]:
+    """Merge scenarios sharing an account or conflicting tags into serial groups
+
+    Scenarios without a hard-coded account use the worker's own
+    credentials and get a group of their own.
+    """
+    groups: List[ScenarioGroup] = []
+    owner: Dict[str, ScenarioGroup] = {}
+    for scenario in scenarios:
+        matched = []
+        for resource in scenario.resources:
+            group = owner.get(resource)
+            if group is not None and group not in matched:
+                matched.append(group)
+
+        if not matched:
+            group = ScenarioGroup()
+            groups.append(group)
+        else:
+            # Join every group touching one of this scenario's resources
+            group = matched[0]
+            for other in matched[1:]:
+                group.scenarios.extend(other.scenarios)
+                groups.remove(other)
+            group.scenarios.sort(key=lambda ref: scenarios.index(ref))
+
+        group.scenarios.append(scenario)
+        for resource in group.resources:
+            owner[resource] = group
+    return groups
+
+
+def estimate_durations(scenarios: List[ScenarioRef], history: DurationHistory) -> None:
+    """Set each scenario's expected duration, the typical one when unknown"""
+    typical = history.typical()
+    for scenario in scenarios:
+        scenario.duration = history.estimate(scenario.filename, scenario.name, typical)
+
+
+def assign_groups(groups: List[ScenarioGroup], workers: int) -> List[List[ScenarioGroup]]:
+    """Distribute groups across workers, longest expected group first
+
+    Each group goes to the least loaded worker (LPT scheduling).
+    """
+    shards: List[List[ScenarioGroup]] = [[] for _ in range(workers)]
+    loads = [0.0] * workers
+    for group in sorted(groups, key=lambda group: group.duration, reverse=True):
+        index = loads.index(min(loads))
+        shards[index].append(group)
+        loads[index] += group.duration
+    return [shard for shard in shards if shard]
+
+
+def load_accounts(path: Optional[str]) -> List[Dict[str, str]]:
+    """Load per-worker credential sets from a JSON list"""
+    if not path:
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def worker_env(worker_id: int, output_dir: Path, account: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Build the environment for one worker process"""
+    env = dict(os.environ)
+    env["BEHAVE_WORKER_ID"] = str(worker_id)
+    env["TEST_LOG_FILE"] = str(output_dir / f"worker-{worker_id}.log")
+    env["DURATION_HISTORY"] = str(output_dir / f"durations-worker-{worker_id}.json")
+    if account:
+        env["TEST_USERNAME"] = account["username"]
+        env["TEST_PASSWORD"] = account["password"]
+    return env
+
+
+def worker_locations(shard: List[ScenarioGroup]) -> List[str]:
+    """Return the locations of a shard, the feature file with the most expected work first
+
+    behave runs feature files in the order their locations first appear
+    and the scenarios of one file in file order, so only whole files can
+    be reordered.
+    """
+    by_file: Dict[str, List[ScenarioRef]] = {}
+    for group in shard:
+        for scenario in group.scenarios:
+            by_file.setdefault(scenario.filename, []).append(scenario)
+    files = sorted(by_file, key=lambda filename: sum(scenario.duration for scenario in by_file[filename]),
+                   reverse=True)
+    return [
+        scenario.location
+        for filename in files
+        for scenario in sorted(by_file[filename], key=lambda scenario: scenario.line)
+    ]
+
+
+def start_worker(worker_id: int, shard: List[ScenarioGroup], output_dir: Path,
+                 account: Optional[Dict[str, str]], behave_args: List[str]) -> subprocess.Popen:
+    """Start a behave process running the scenarios of one shard"""
+    locations = worker_locations(shard)
+    command = [
+        sys.executable, "-m", "behave",
+        "-f", "json", "-o", str(output_dir / f"worker-{worker_id}.json"),
+        "-f", "progress", "-o", str(output_dir / f"worker-{worker_id}.out"),
+        *behave_args,
+        *locations
+    ]
+    return subprocess.Popen(command, env=worker_env(worker_id, output_dir, account))
+
+
+def merge_reports(report_paths: List[Path]) -> List[Dict]:
+    """Merge behave JSON reports into one list of features
+
+    Every worker reports the scenarios it did not select as skipped, so
+    for each scenario the element from the worker that ran it wins.
+    """
+    features: Dict[str, Dict] = {}
+    elements: Dict[str, Dict[str, Dict]] = {}
+    for path in report_paths:
+        if not path.exists() or path.stat().st_size == 0:
+            continue
+        with open(path) as f:
+            for feature in json.load(f):
+                features.setdefault(feature["location"], feature)
+                merged = elements.setdefault(feature["location"], {})
+                for element in feature.get("elements", []):
+                    current = merged.get(element["location"])
+                    if current is None or current.get("status") in (None, "skipped", "untested"):
+                        merged[element["location"]] = element
+
+    report = []
+    for location, feature in sorted(features.items()):
+        feature = dict(feature, elements=sorted(
+            elements[location].values(),
+            key=lambda element: int(element["location"].rsplit(":", 1)[1])
+        ))
+        statuses = {element.get("status") for element in feature["elements"]}
+        if "failed" in statuses:
+            feature["status"] = "failed"
+        elif "passed" in statuses:
+            feature["status"] = "passed"
+        else:
+            feature["status"] = "skipped"
+        report.append(feature)
+    return report
+
+
+def summarize(features: List[Dict]) -> Dict[str, Dict[str, int]]:
+    """Count features and scenarios by status"""
+    summary = {"features": {}, "scenarios": {}}
+    for feature in features:
+        status = feature.get("status") or "untested"
+        summary["features"][status] = summary["features"].get(status, 0) + 1
+        for element in feature["elements"]:
+            if element.get("type") != "scenario":
+                continue
+            status = element.get("status") or "untested"
+            summary["scenarios"][status] = summary["scenarios"].get(status, 0) + 1
+    return summary
+
+
+def run(paths: List[str], workers: int, output_dir: Path, accounts: List[Dict[str, str]],
+        behave_args: List[str], history_path: str = DEFAULT_HISTORY_PATH) -> int:
+    """Run the scenarios in parallel and write the merged report"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if accounts:
+        workers = min(workers, len(accounts))
+
+    history = DurationHistory(history_path)
+    scenarios = discover_scenarios(paths)
+    estimate_durations(scenarios, history)
+    groups = group_by_account(scenarios)
+    shards = assign_groups(groups, max(workers, 1))
+    expected = max(sum(group.duration for group in shard) for shard in shards) if shards else 0
+    print(f"{len(scenarios)} scenarios in {len(groups)} groups on {len(shards)} workers, "
+          f"expected {expected:.1f}s (longest group {max((g.duration for g in groups), default=0):.1f}s)")
+
+    worker_histories = [output_dir / f"durations-worker-{worker_id}.json" for worker_id in range(len(shards))]
+    for path in worker_histories:
+        if path.exists():
+            path.unlink()
+
+    started = time.monotonic()
+    processes = []
+    for worker_id, shard in enumerate(shards):
+        account = accounts[worker_id] if accounts else None
+        processes.append(start_worker(worker_id, shard, output_dir, account, behave_args))
+    exit_codes = [process.wait() for process in processes]
+    elapsed = time.monotonic() - started
+
+    history.merge(str(path) for path in worker_histories if path.exists())
+    history.save()
+
+    features = merge_reports([output_dir / f"worker-{worker_id}.json" for worker_id in range(len(shards))])
+    with open(output_dir / "report.json", "w") as f:
+        json.dump(features, f, indent=2)
+
+    summary = summarize(features)
+    for kind in ("features", "scenarios"):
+        counts = ", ".join(f"{count} {status}" for status, count in sorted(summary[kind].items()))
+        print(f"{kind}: {counts or 'none'}")
+    print(f"{len(shards)} workers took {elapsed:.1f}s, report written to {output_dir / 'report.json'}")
+
+    failed = summary["scenarios"].get("failed", 0) or any(exit_codes)
+    return 1 if failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run behave scenarios in parallel worker processes")
+    parser.add_argument("paths", nargs="*", default=["features"], help="Feature files or directories")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Number of worker processes")
+    parser.add_argument("--accounts", help="JSON file with one {username, password} set per worker")
+    parser.add_argument("--output-dir", default="reports/parallel", help="Directory for logs and reports")
+    parser.add_argument("--history", default=os.getenv("DURATION_HISTORY", DEFAULT_HISTORY_PATH),
+                        help="Duration history used for scheduling and updated after the run")
+    args, behave_args = parser.parse_known_args(argv)
+
+    return run(
+        args.paths, args.workers, Path(args.output_dir), load_accounts(args.accounts), behave_args, args.history
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
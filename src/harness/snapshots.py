@@ -0,0 +1,126 @@
+"""Snapshots of precondition steps shared across scenarios
+
+The first time a decorated precondition step runs with given arguments
+and account, the state it leaves behind (changed `test_data` entries and
+the client token) is captured. Later scenarios running the same step
+restore that state instead of repeating the setup requests; steps that
+change server state confirm it with a cheaper read first. Scenarios
+tagged with one of MUTATING_TAGS, and failed scenarios, invalidate the
+snapshots of the account they ran as; a snapshot whose token is no
+longer fresh in the token cache is never restored.
+"""
+import functools
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tags of scenarios that change account state captured by snapshots
+MUTATING_TAGS = {"DELETE_User", "POST_Books", "DELETE_Books", "DELETE_Book"}
+
+
+class Snapshot:
+    """State left behind by one precondition step"""
+
+    def __init__(self, username: Optional[str], password: Optional[str], changes: Dict[str, Any],
+                 token: Optional[str]):
+        self.username = username
+        self.password = password
+        self.changes = changes
+        self.token = token
+
+
+class SnapshotStore:
+    """Snapshots by step, arguments and account"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._snapshots: Dict[Hashable, Snapshot] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Snapshot]:
+        with self._lock:
+            return self._snapshots.get(key)
+
+    def put(self, key: Hashable, snapshot: Snapshot) -> None:
+        with self._lock:
+            self._snapshots[key] = snapshot
+
+    def invalidate(self, username: Optional[str] = None) -> None:
+        """Drop the snapshots of one account, or all of them"""
+        with self._lock:
+            keys = [
+                key for key, snapshot in self._snapshots.items()
+                if username is None or snapshot.username == username
+            ]
+            for key in keys:
+                del self._snapshots[key]
+            self.invalidations += len(keys)
+
+    def scenario_finished(self, username: Optional[str], failed: bool, tags: Iterable[str]) -> None:
+        """Drop the account's snapshots after a failed or mutating scenario"""
+        if failed or MUTATING_TAGS & set(tags):
+            self.invalidate(username)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "snapshots": len(self._snapshots)
+        }
+
+
+def snapshot(step: Optional[Callable] = None, *, check: Optional[Callable] = None) -> Callable:
+    """Decorate a precondition step so its resulting state is reused
+
+    Place it below the behave decorator. A step with server-side effects
+    must pass `check(context) -> bool`, called after a restore to confirm
+    the server still holds that state; when it does not, the step runs
+    again. Without `context.snapshots` the step always runs.
+    """
+    if step is None:
+        return functools.partial(snapshot, check=check)
+
+    @functools.wraps(step)
+    def wrapper(context, *args, **kwargs):
+        store: Optional[SnapshotStore] = getattr(context, "snapshots", None)
+        if store is None:
+            return step(context, *args, **kwargs)
+
+        before = dict(context.test_data)
+        key = (step.__qualname__, args, tuple(sorted(kwargs.items())), before.get("username"))
+        saved = store.get(key)
+        if saved is not None and _fresh(context, saved):
+            context.test_data.update(saved.changes)
+            context.api.set_token(saved.token)
+            if check is None or check(context):
+                store.hits += 1
+                logger.info(f"Restored snapshot of '{step.__name__}' for {saved.username}")
+                return None
+            logger.info(f"Snapshot of '{step.__name__}' for {saved.username} no longer holds, running the step")
+
+        store.misses += 1
+        result = step(context, *args, **kwargs)
+        changes = {name: value for name, value in context.test_data.items() if before.get(name) != value}
+        store.put(key, Snapshot(
+            context.test_data.get("username"), context.test_data.get("password"), changes, context.api.token
+        ))
+        return result
+
+    return wrapper
+
+
+def _fresh(context, saved: Snapshot) -> bool:
+    """A snapshot with a token is only good while the token cache still holds that token"""
+    if saved.token is None:
+        return True
+    entry = context.api.token_cache.get(saved.username, saved.password)
+    return entry is not None and entry.get("token") == saved.token
@@ -0,0 +1,139 @@
+"""Startup profile of a behave run
+
+With STARTUP_PROFILE set, features/environment.py times every module
+imported from the environment and step files, every hook, and the first
+request the API client completes. Times are measured from the import of
+the environment module; where the OS exposes it, the time the process
+had already spent before that (interpreter and behave startup) is
+reported too. The report is printed and written as JSON when the
+process exits.
+
+Only the standard library is imported here so that the profile starts
+before anything it measures.
+"""
+import atexit
+import builtins
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+def process_age() -> Optional[float]:
+    """Seconds since the process started, where /proc provides it"""
+    try:
+        with open("/proc/self/stat") as f:
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(uptime - started_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+
+
+class StartupProfile:
+    """Import, hook and first-request timings of one process
+
+    Disabled profiles leave imports and hooks untouched.
+    """
+
+    # Imports listed in the printed report
+    TOP_IMPORTS = 15
+
+    def __init__(self, enabled: bool, path: Optional[str] = None):
+        self.enabled = enabled
+        self.path = path
+        self.origin = time.perf_counter()
+        self.before_origin = process_age() if enabled else None
+        # Outermost imports, in order: [module, seconds]
+        self.imports: List[list] = []
+        # Hook name -> [calls, seconds]
+        self.hooks: Dict[str, list] = {}
+        self.first_request: Optional[float] = None
+        self._local = threading.local()
+        self._import = builtins.__import__
+        if enabled:
+            builtins.__import__ = self._timed_import
+            atexit.register(self._finish)
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Only time imports that load something, and only the outermost one
+        if level or getattr(self._local, "importing", False) or name in sys.modules:
+            return self._import(name, globals, locals, fromlist, level)
+        self._local.importing = True
+        started = time.perf_counter()
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            self._local.importing = False
+            self.imports.append([name, time.perf_counter() - started])
+
+    def hook(self, fn: Callable) -> Callable:
+        """Decorate a behave hook to accumulate its duration"""
+        if not self.enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                entry = self.hooks.setdefault(fn.__name__, [0, 0.0])
+                entry[0] += 1
+                entry[1] += time.perf_counter() - started
+
+        return wrapper
+
+    def observe_request(self, record) -> None:
+        """Request hook marking the first completed request"""
+        if self.first_request is None:
+            self.first_request = time.perf_counter() - self.origin
+
+    def report(self) -> Dict:
+        imports = sorted(self.imports, key=lambda entry: entry[1], reverse=True)
+        return {
+            "before_environment_s": _round(self.before_origin),
+            "first_request_s": _round(self.first_request),
+            "first_request_since_start_s": _round(
+                self.first_request + self.before_origin
+                if self.first_request is not None and self.before_origin is not None else None
+            ),
+            "imports_s": _round(sum(seconds for _, seconds in self.imports)),
+            "imports": [{"module": name, "s": _round(seconds)} for name, seconds in imports],
+            "hooks": {
+                name: {"calls": calls, "total_s": _round(seconds)}
+                for name, (calls, seconds) in sorted(self.hooks.items())
+            }
+        }
+
+    def format_report(self, report: Dict) -> str:
+        lines = [
+            f"Startup profile (seconds since environment import, process started "
+            f"{report['before_environment_s']}s earlier)",
+            f"  first request completed at {report['first_request_s']}",
+            f"  imports {report['imports_s']}:"
+        ]
+        lines += [f"    {entry['s']:>8.4f}  {entry['module']}" for entry in report["imports"][:self.TOP_IMPORTS]]
+        lines.append("  hooks:")
+        lines += [
+            f"    {timing['total_s']:>8.4f}  {name} x{timing['calls']}" for name, timing in report["hooks"].items()
+        ]
+        return "\n".join(lines)
+
+    def _finish(self) -> None:
+        builtins.__import__ = self._import
+        report = self.report()
+        print(self.format_report(report), file=sys.stderr)
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"Startup profile written to {self.path}", file=sys.stderr)
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
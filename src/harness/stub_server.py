@@ -0,0 +1,412 @@
+"""In-process stand-in for the DemoQA BookStore API
+
+Implements the Account/v1 and BookStore/v1 endpoints used by APIClient
+on top of in-memory state, so the feature suite can run without network
+access. Responses follow the shapes and status codes of demoqa.com.
+
+Usage:
+    python -m src.harness.stub_server --port 8000 --latency-ms 20
+"""
+import argparse
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    import brotli
+except ImportError:  # br responses only when brotli is installed
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEED = Path(__file__).resolve().parents[2] / "features" / "fixtures" / "stub_seed.json"
+
+# Passwords must have 8+ characters, an upper and lower case letter, a digit and a symbol
+PASSWORD_RULE = re.compile(r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[^A-Za-z0-9]).{8,}$")
+
+TOKEN_LIFETIME = timedelta(days=7)
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def _error(status: int, code: str, message: str) -> Tuple[int, Dict]:
+    return status, {"code": code, "message": message}
+
+
+def load_seed(path: Optional[str] = None) -> Dict:
+    """Load users and books for the stub from a JSON seed file"""
+    with open(path or DEFAULT_SEED) as f:
+        return json.load(f)
+
+
+class BookStoreState:
+    """In-memory users, tokens and collections"""
+
+    def __init__(self, seed: Optional[Dict] = None):
+        seed = seed if seed is not None else load_seed()
+        self.books: Dict[str, Dict] = {book["isbn"]: book for book in seed.get("books", [])}
+        self.catalog_etag = '"' + hashlib.sha1(json.dumps(seed.get("books", [])).encode()).hexdigest() + '"'
+        self.users: Dict[str, Dict] = {}
+        self.tokens: Dict[str, str] = {}
+        self.lock = threading.RLock()
+        for user in seed.get("users", []):
+            self.add_user(user["username"], user["password"], user.get("userId"))
+
+    def add_user(self, username: str, password: str, user_id: Optional[str] = None) -> Dict:
+        """Create a user unless the username is taken and return it"""
+        with self.lock:
+            existing = self.find_user(username)
+            if existing:
+                return existing
+            user = {
+                "userId": user_id or str(uuid.uuid4()),
+                "username": username,
+                "password": password,
+                "books": [],
+                "token": None,
+                "expires": None,
+                "created_date": _timestamp(datetime.now(timezone.utc))
+            }
+            self.users[user["userId"]] = user
+            return user
+
+    def find_user(self, username: str, password: Optional[str] = None) -> Optional[Dict]:
+        for user in self.users.values():
+            if user["username"] == username and (password is None or user["password"] == password):
+                return user
+        return None
+
+    def issue_token(self, user: Dict) -> None:
+        if user["token"] and not self.token_expired(user):
+            return
+        self.tokens.pop(user["token"], None)
+        user["token"] = uuid.uuid4().hex
+        user["expires"] = _timestamp(datetime.now(timezone.utc) + TOKEN_LIFETIME)
+        self.tokens[user["token"]] = user["userId"]
+
+    @staticmethod
+    def token_expired(user: Dict) -> bool:
+        expires = datetime.fromisoformat(user["expires"].replace("Z", "+00:00"))
+        return expires <= datetime.now(timezone.utc)
+
+    def user_for_token(self, authorization: Optional[str]) -> Optional[Dict]:
+        if not authorization or not authorization.startswith("Bearer "):
+            return None
+        user = self.users.get(self.tokens.get(authorization[len("Bearer "):], ""))
+        if user is None or self.token_expired(user):
+            return None
+        return user
+
+
+class BookStoreHandler(BaseHTTPRequestHandler):
+    """Routes requests to the BookStore endpoint implementations"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; avoid delayed-ACK stalls
+    disable_nagle_algorithm = True
+    # Bodies smaller than this are sent uncompressed
+    COMPRESS_MIN_SIZE = 512
+    server: "BookStoreServer"
+
+    ROUTES = [
+        ("POST", re.compile(r"^/Account/v1/User$"), "create_user"),
+        ("GET", re.compile(r"^/Account/v1/User/(?P<user_id>[^/]+)$"), "get_user"),
+        ("DELETE", re.compile(r"^/Account/v1/User/(?P<user_id>[^/]+)$"), "delete_user"),
+        ("GET", re.compile(r"^/Account/v1/User/(?P<user_id>[^/]+)/Books$"), "get_user_books"),
+        ("POST", re.compile(r"^/Account/v1/Login$"), "login"),
+        ("POST", re.compile(r"^/Account/v1/GenerateToken$"), "generate_token"),
+        ("POST", re.compile(r"^/Account/v1/Authorized$"), "authorized"),
+        ("GET", re.compile(r"^/BookStore/v1/Books$"), "get_books"),
+        ("POST", re.compile(r"^/BookStore/v1/Books$"), "add_books"),
+        ("DELETE", re.compile(r"^/BookStore/v1/Books$"), "clear_books"),
+        ("GET", re.compile(r"^/BookStore/v1/Book$"), "get_book"),
+        ("DELETE", re.compile(r"^/BookStore/v1/Book$"), "delete_book"),
+    ]
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def _dispatch(self, method: str) -> None:
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        parts = urlsplit(self.path)
+        self.query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            self.body = json.loads(raw) if raw else {}
+        except ValueError:
+            self._send(400, {"code": "1200", "message": "Invalid JSON body."})
+            return
+
+        for route_method, pattern, name in self.ROUTES:
+            match = pattern.match(parts.path)
+            if match and route_method == method:
+                with self.server.state.lock:
+                    status, payload, headers = self._call(name, match.groupdict())
+                self._send(status, payload, headers)
+                return
+        self._send(404, {"code": "404", "message": "Not Found"})
+
+    def _call(self, name: str, params: Dict) -> Tuple[int, object, Dict]:
+        result = getattr(self, name)(**params)
+        return result if len(result) == 3 else (*result, {})
+
+    def _compress(self, content: bytes) -> Tuple[bytes, Optional[str]]:
+        """Compress a body with the first encoding the client accepts"""
+        if len(content) < self.COMPRESS_MIN_SIZE:
+            return content, None
+        accepted = {value.split(";")[0].strip() for value in self.headers.get("Accept-Encoding", "").split(",")}
+        if "br" in accepted and brotli is not None:
+            return brotli.compress(content), "br"
+        if "gzip" in accepted:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            return compressor.compress(content) + compressor.flush(), "gzip"
+        if "deflate" in accepted:
+            return zlib.compress(content), "deflate"
+        return content, None
+
+    def _send(self, status: int, payload: object = None, headers: Optional[Dict] = None) -> None:
+        content = b"" if payload is None or status in (204, 304) else json.dumps(payload).encode("utf-8")
+        content, encoding = self._compress(content)
+        self.send_response(status)
+        if content:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+            self.send_header("Vary", "Accept-Encoding")
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    @property
+    def state(self) -> BookStoreState:
+        return self.server.state
+
+    def _authorized_user(self, user_id: Optional[str] = None) -> Optional[Dict]:
+        user = self.state.user_for_token(self.headers.get("Authorization"))
+        if user is None or (user_id is not None and user["userId"] != user_id):
+            return None
+        return user
+
+    def _credentials(self) -> Tuple[Optional[str], Optional[str]]:
+        return self.body.get("userName"), self.body.get("password")
+
+    def _books_of(self, user: Dict) -> List[Dict]:
+        return [self.state.books[isbn] for isbn in user["books"] if isbn in self.state.books]
+
+    # Account endpoints
+    def create_user(self):
+        username, password = self._credentials()
+        if not username or not password:
+            return _error(400, "1200", "UserName and Password required.")
+        if not PASSWORD_RULE.match(password):
+            return _error(400, "1300", "Passwords must have at least one non alphanumeric character, "
+                                       "one digit ('0'-'9'), one uppercase ('A'-'Z'), one lowercase ('a'-'z'), "
+                                       "one special character and Password must be eight characters or longer.")
+        if self.state.find_user(username):
+            return _error(406, "1204", "User exists!")
+        user = self.state.add_user(username, password)
+        return 201, {"userID": user["userId"], "username": user["username"], "books": []}
+
+    def get_user(self, user_id):
+        user = self._authorized_user(user_id)
+        if user is None:
+            return _error(401, "1200", "User not authorized!")
+        return 200, {"userId": user["userId"], "username": user["username"], "books": self._books_of(user)}
+
+    def get_user_books(self, user_id):
+        user = self._authorized_user(user_id)
+        if user is None:
+            return _error(401, "1200", "User not authorized!")
+        return 200, {"books": self._books_of(user)}
+
+    def delete_user(self, user_id):
+        user = self._authorized_user(user_id)
+        if user is None:
+            return _error(401, "1200", "User not authorized!")
+        self.state.tokens.pop(user["token"], None)
+        del self.state.users[user_id]
+        return 204, None
+
+    def login(self):
+        username, password = self._credentials()
+        if not username or not password:
+            return _error(400, "1200", "UserName and Password required.")
+        user = self.state.find_user(username, password)
+        if user is None:
+            return _error(404, "1207", "User not found!")
+        self.state.issue_token(user)
+        return 200, {
+            "userId": user["userId"],
+            "username": user["username"],
+            "password": user["password"],
+            "token": user["token"],
+            "expires": user["expires"],
+            "created_date": user["created_date"],
+            "isActive": False
+        }
+
+    def generate_token(self):
+        username, password = self._credentials()
+        if not username or not password:
+            return _error(400, "1200", "UserName and Password required.")
+        user = self.state.find_user(username, password)
+        if user is None:
+            return 200, {"token": None, "expires": None, "status": "Failed", "result": "User authorization failed."}
+        self.state.issue_token(user)
+        return 200, {
+            "token": user["token"],
+            "expires": user["expires"],
+            "status": "Success",
+            "result": "User authorized successfully."
+        }
+
+    def authorized(self):
+        username, password = self._credentials()
+        if not username or not password:
+            return _error(400, "1200", "UserName and Password required.")
+        user = self.state.find_user(username, password)
+        if user is None:
+            return _error(404, "1207", "User not found!")
+        return 200, bool(user["token"]) and not self.state.token_expired(user)
+
+    # BookStore endpoints
+    def get_books(self):
+        etag = self.state.catalog_etag
+        if self.headers.get("If-None-Match") == etag:
+            return 304, None, {"ETag": etag}
+        return 200, {"books": list(self.state.books.values())}, {"ETag": etag}
+
+    def get_book(self):
+        book = self.state.books.get(self.query.get("ISBN", ""))
+        if book is None:
+            return _error(400, "1205", "ISBN supplied is not available in Books Collection!")
+        return 200, book
+
+    def add_books(self):
+        user = self._authorized_user(self.body.get("userId"))
+        if user is None:
+            return _error(401, "1200", "User not authorized!")
+        isbns = [item.get("isbn") for item in self.body.get("collectionOfIsbns") or []]
+        for isbn in isbns:
+            if isbn not in self.state.books:
+                return _error(400, "1205", "ISBN supplied is not available in Books Collection!")
+            if isbn in user["books"]:
+                return _error(400, "1210", "ISBN already present in the User's Collection!")
+        user["books"].extend(isbns)
+        return 201, {"books": [{"isbn": isbn} for isbn in isbns]}
+
+    def clear_books(self):
+        # Like demoqa, DELETE /Books?UserId= clears the whole collection
+        user = self._authorized_user(self.query.get("UserId"))
+        if user is None:
+            return _error(401, "1200", "User not authorized!")
+        user["books"] = []
+        return 204, None
+
+    def delete_book(self):
+        user = self._authorized_user(self.body.get("userId"))
+        if user is None:
+            return _error(401, "1200", "User not authorized!")
+        isbn = self.body.get("isbn")
+        if isbn not in user["books"]:
+            return _error(400, "1206", "ISBN supplied is not available in User's Collection!")
+        user["books"].remove(isbn)
+        return 204, None
+
+
+class BookStoreServer(ThreadingHTTPServer):
+    """HTTP server holding the stub state and injected latency"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], state: BookStoreState, latency: float = 0.0):
+        super().__init__(address, BookStoreHandler)
+        self.state = state
+        self.latency = latency
+
+
+class StubServer:
+    """Runs a BookStoreServer on a background thread"""
+
+    def __init__(self, seed: Optional[Dict] = None, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0):
+        """Initialize stub server; port 0 picks a free port"""
+        self.state = BookStoreState(seed)
+        self.server = BookStoreServer((host, port), self.state, latency)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        """Start serving on a daemon thread"""
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, name="bookstore-stub", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"BookStore stub listening on {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket"""
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the BookStore stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every request")
+    parser.add_argument("--seed", help="JSON seed file with users and books")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    stub = StubServer(load_seed(args.seed), args.host, args.port, args.latency_ms / 1000)
+    logger.info(f"BookStore stub listening on {stub.base_url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
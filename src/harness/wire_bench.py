@@ -0,0 +1,179 @@
+"""Benchmark JSON codecs and response compression on BookStore payloads
+
+Builds payloads shaped like the responses the scenarios fetch (the
+catalog, a user with a book collection, a login) from the stub seed,
+scaled to several catalog sizes. For every installed codec it times
+encoding and decoding; for every encoding urllib3 can decode here it
+reports the compressed size and decompression time. With --stub it also
+fetches the catalog end to end with compression on and off.
+
+Usage:
+    python -m src.harness.wire_bench --books 8,100,1000 --stub
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from src.api.api_client import APIClient
+from src.api.codec import CODECS
+from src.harness.stub_server import StubServer, load_seed
+
+try:
+    import brotli
+except ImportError:  # br only measured when brotli is installed
+    brotli = None
+
+ENCODINGS: Dict[str, Callable[[bytes], bytes]] = {
+    "gzip": lambda data: gzip.compress(data, 6),
+    "deflate": lambda data: zlib.compress(data, 6),
+}
+DECODERS: Dict[str, Callable[[bytes], bytes]] = {
+    "gzip": gzip.decompress,
+    "deflate": zlib.decompress,
+}
+if brotli is not None:
+    ENCODINGS["br"] = brotli.compress
+    DECODERS["br"] = brotli.decompress
+
+
+def build_payloads(book_counts: List[int]) -> Dict[str, object]:
+    """Return catalog, user and login payloads, catalogs scaled to each size"""
+    books = load_seed()["books"]
+    payloads = {}
+    for count in book_counts:
+        catalog = []
+        for index in range(count):
+            book = dict(books[index % len(books)])
+            book["isbn"] = f"{9780000000000 + index}"
+            catalog.append(book)
+        payloads[f"catalog[{count}]"] = {"books": catalog}
+    payloads["user[3 books]"] = {
+        "userId": "30e4bb09-77df-4ac7-9b11-abf64ab0f24c",
+        "username": "afinapd",
+        "books": books[:3]
+    }
+    payloads["login"] = {
+        "userId": "30e4bb09-77df-4ac7-9b11-abf64ab0f24c",
+        "username": "afinapd",
+        "password": "Afina12345!",
+        "token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9." + "x" * 120,
+        "expires": "2026-10-25T06:43:40.000Z",
+        "created_date": "2023-01-01T00:00:00.000Z",
+        "isActive": False
+    }
+    return payloads
+
+
+def best_time(fn: Callable[[], object], budget: float = 0.2) -> float:
+    """Best per-call seconds of fn over repeated batches within a time budget"""
+    calls = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= budget / 10:
+            break
+        calls *= 2
+    best = elapsed / calls
+    deadline = time.perf_counter() + budget
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, (time.perf_counter() - started) / calls)
+    return best
+
+
+def bench_payloads(payloads: Dict[str, object]) -> Dict[str, Dict]:
+    """Time every codec and encoding on every payload"""
+    results = {}
+    for name, payload in payloads.items():
+        raw = json.dumps(payload).encode("utf-8")
+        result = {"bytes": len(raw), "codecs": {}, "encodings": {}}
+        for codec_name, codec in sorted(CODECS.items()):
+            result["codecs"][codec_name] = {
+                "dumps_us": round(best_time(lambda: codec.dumps(payload)) * 1e6, 2),
+                "loads_us": round(best_time(lambda: codec.loads(raw)) * 1e6, 2)
+            }
+        for encoding, compress in ENCODINGS.items():
+            compressed = compress(raw)
+            result["encodings"][encoding] = {
+                "bytes": len(compressed),
+                "ratio": round(len(compressed) / len(raw), 3),
+                "decode_us": round(best_time(lambda: DECODERS[encoding](compressed)) * 1e6, 2)
+            }
+        results[name] = result
+    return results
+
+
+def bench_stub(requests_per_mode: int, latency: float) -> Dict[str, Dict]:
+    """Fetch the catalog from the stub with and without compression"""
+    results = {}
+    with StubServer(latency=latency) as stub:
+        for compress in (False, True):
+            with APIClient(base_url=stub.base_url, compress=compress) as api:
+                sizes = []
+                api.add_request_hook(lambda record: sizes.append((record.response_bytes, record.wire_bytes)))
+                started = time.perf_counter()
+                for _ in range(requests_per_mode):
+                    api.get_books(bypass_cache=True).json()
+                elapsed = time.perf_counter() - started
+            results["compressed" if compress else "identity"] = {
+                "encoding": api.session.headers["Accept-Encoding"],
+                "ms_per_request": round(elapsed * 1000 / requests_per_mode, 3),
+                "response_bytes": sizes[-1][0],
+                "wire_bytes": sizes[-1][1]
+            }
+    return results
+
+
+def format_report(report: Dict) -> str:
+    lines = []
+    for name, result in report["payloads"].items():
+        codecs = ", ".join(
+            f"{codec} dumps {timing['dumps_us']}us loads {timing['loads_us']}us"
+            for codec, timing in result["codecs"].items()
+        )
+        encodings = ", ".join(
+            f"{encoding} {timing['bytes']}B ({timing['ratio']:.0%}, {timing['decode_us']}us)"
+            for encoding, timing in result["encodings"].items()
+        )
+        lines.append(f"{name:<16} {result['bytes']:>8}B  {codecs}")
+        lines.append(f"{'':<16} {'':>9}  {encodings}")
+    for mode, result in report.get("stub", {}).items():
+        lines.append(
+            f"stub {mode:<11} {result['ms_per_request']:>8.3f} ms/request, "
+            f"{result['wire_bytes']}B on the wire for {result['response_bytes']}B"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark JSON codecs and compression on BookStore payloads")
+    parser.add_argument("--books", default="8,100,1000", help="Comma-separated catalog sizes")
+    parser.add_argument("--stub", action="store_true", help="Also fetch the catalog from a stub server")
+    parser.add_argument("--requests", type=int, default=200, help="Catalog requests per stub mode")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0)
+    parser.add_argument("--output", default="reports/wire-bench.json")
+    args = parser.parse_args(argv)
+
+    report = {"payloads": bench_payloads(build_payloads([int(count) for count in args.books.split(",")]))}
+    if args.stub:
+        report["stub"] = bench_stub(args.requests, args.stub_latency_ms / 1000)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(format_report(report))
+    print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
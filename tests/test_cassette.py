@@ -0,0 +1,47 @@
+from src.api.api_client import APIClient
+from src.api.cassette import RECORD, REPLAY, Cassette
+from src.api.responses import build_response
+from src.api.retry import CircuitBreakers, RetryPolicy, Throttle
+
+URL = "http://bookstore.invalid/BookStore/v1/Books"
+
+
+def record(path, title):
+    cassette = Cassette(str(path), RECORD)
+    cassette.record("GET", URL, None, None, {}, build_response(200, {"title": title}, URL), 0.01)
+    cassette.close()
+
+
+def test_recording_again_replaces_the_previous_session(tmp_path):
+    path = tmp_path / "run.jsonl"
+    record(path, "first")
+    record(path, "second")
+    cassette = Cassette(str(path), REPLAY)
+    assert cassette.replay("GET", URL).json() == {"title": "second"}
+    cassette.close()
+    assert len(path.read_text().splitlines()) == 1
+
+
+def test_retried_request_replays_its_final_response(tmp_path):
+    path = tmp_path / "run.jsonl"
+    outcomes = [build_response(503, {"message": "busy"}, URL), build_response(200, {"books": []}, URL)]
+    cassette = Cassette(str(path), RECORD)
+    client = APIClient(
+        base_url="http://bookstore.invalid",
+        cassette=cassette,
+        retry_policy=RetryPolicy(max_retries=2, backoff=0),
+        throttle=Throttle(),
+        breakers=CircuitBreakers()
+    )
+    client._send = lambda method, url, headers, **kwargs: outcomes.pop(0)
+    assert client.get_books(bypass_cache=True).status_code == 200
+    client.close()
+    cassette.close()
+    assert len(path.read_text().splitlines()) == 1
+
+    cassette = Cassette(str(path), REPLAY)
+    with APIClient(base_url="http://bookstore.invalid", cassette=cassette) as replay:
+        response = replay.get_books(bypass_cache=True)
+        assert response.status_code == 200
+        assert response.json() == {"books": []}
+    cassette.close()
@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.api import catalog_cache
+from src.api.api_client import APIClient
+from src.api.catalog_cache import CatalogCache
+from src.api.responses import build_response
+from src.harness.stub_server import StubServer
+
+URL = "http://bookstore.invalid/BookStore/v1/Books"
+TTL = 60
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic clock of the catalog cache, advanced by hand"""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(catalog_cache, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def book(isbn):
+    return {"isbn": isbn, "title": f"Book {isbn}"}
+
+
+def catalog(*isbns, headers=None):
+    return build_response(200, {"books": [book(isbn) for isbn in isbns]}, URL, headers)
+
+
+class TestCatalogCache:
+    def test_catalog_served_until_ttl(self, clock):
+        cache = CatalogCache(ttl=TTL)
+        response = catalog("1", "2")
+        cache.store_catalog(response)
+        assert cache.catalog() is response
+        assert cache.lookup("2") == book("2")
+        clock.now += TTL + 1
+        assert cache.catalog() is None
+        assert cache.lookup("2") is None
+
+    def test_failed_catalog_not_cached(self, clock):
+        cache = CatalogCache(ttl=TTL)
+        cache.store_catalog(build_response(503, {"message": "busy"}, URL))
+        assert not cache.loaded
+
+    def test_validators_from_cached_response(self, clock):
+        cache = CatalogCache(ttl=TTL)
+        assert cache.validators() == {}
+        cache.store_catalog(catalog("1", headers={"ETag": '"v1"', "Last-Modified": "Thu, 04 Jun 2020 08:48:39 GMT"}))
+        assert cache.validators() == {
+            "If-None-Match": '"v1"', "If-Modified-Since": "Thu, 04 Jun 2020 08:48:39 GMT"
+        }
+
+    def test_revalidation_refreshes_catalog_and_index(self, clock):
+        cache = CatalogCache(ttl=TTL)
+        response = catalog("1", headers={"ETag": '"v1"'})
+        cache.store_catalog(response)
+        clock.now += TTL + 1
+        assert cache.revalidated() is response
+        assert cache.catalog() is response
+        assert cache.lookup("1") == book("1")
+        assert cache.stats()["revalidations"] == 1
+
+    def test_least_recently_used_book_evicted(self, clock):
+        cache = CatalogCache(ttl=TTL, max_entries=2)
+        cache.store_book(book("1"))
+        cache.store_book(book("2"))
+        cache.lookup("1")
+        cache.store_book(book("3"))
+        assert cache.lookup("2") is None
+        assert cache.lookup("1") == book("1")
+        assert cache.lookup("3") == book("3")
+
+
+class TestClientCatalog:
+    @pytest.fixture
+    def stub(self):
+        with StubServer() as stub:
+            yield stub
+
+    @pytest.fixture
+    def api(self, stub, clock):
+        with APIClient(base_url=stub.base_url, catalog_cache=CatalogCache(ttl=TTL)) as api:
+            api.statuses = []
+            api.add_request_hook(lambda record: api.statuses.append(record.status))
+            yield api
+
+    def test_fresh_catalog_sends_no_request(self, api):
+        first = api.get_books()
+        assert api.get_books() is first
+        assert api.get_book(api.first_isbn()).status_code == 200
+        assert api.statuses == [200]
+
+    def test_stale_catalog_reused_after_304(self, api, clock):
+        first = api.get_books()
+        clock.now += TTL + 1
+        assert api.get_books() is first
+        assert api.statuses == [200, 304]
+        assert api.catalog.stats()["revalidations"] == 1
+        # Revalidation makes the catalog fresh again
+        assert api.get_books() is first
+        assert api.statuses == [200, 304]
+
+    def test_changed_catalog_replaces_cache(self, stub, api, clock):
+        isbn = api.first_isbn()
+        # A write to the server's catalog changes its ETag
+        with stub.state.lock:
+            removed = stub.state.books.pop(isbn)
+            stub.state.books["9999999999999"] = {**removed, "isbn": "9999999999999"}
+            stub.state.catalog_etag = '"changed"'
+        clock.now += TTL + 1
+        response = api.get_books()
+        assert api.statuses == [200, 200]
+        assert [book["isbn"] for book in response.json()["books"]] == list(stub.state.books)
+        assert api.get_book("9999999999999").json()["isbn"] == "9999999999999"
+        assert api.get_book(isbn).status_code != 200
+        assert api.catalog.stats()["revalidations"] == 0
+
+    def test_bypass_always_sends_request(self, api):
+        api.get_books()
+        api.get_books(bypass_cache=True)
+        api.catalog.bypass = True
+        api.get_books()
+        assert api.statuses == [200, 200, 200]
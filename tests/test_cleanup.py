@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+from src.api.cassette import RECORD, Cassette
+from src.api.responses import build_response
+from src.harness.cleanup import CleanupQueue
+
+URL = "http://bookstore.invalid/BookStore/v1/Books"
+
+
+def run(queue, *statuses):
+    for index, status in enumerate(statuses):
+        queue.submit("user", f"action {index}", lambda api, status=status: SimpleNamespace(status_code=status))
+    assert queue.drain(timeout=5) == 0
+    return queue.stats()
+
+
+def test_only_2xx_results_count_as_completed():
+    stats = run(CleanupQueue("http://bookstore.invalid"), 200, 204, 400, 401, 404, 503)
+    assert stats["completed"] == 2
+    assert stats["failed"] == 4
+
+
+def test_actions_run_once():
+    calls = []
+    queue = CleanupQueue("http://bookstore.invalid", retries=3)
+    queue.submit("user", "failing action", lambda api: calls.append(api) or SimpleNamespace(status_code=503))
+    queue.drain(timeout=5)
+    assert len(calls) == 1
+    assert queue.stats()["failed"] == 1
+
+
+def test_drain_leaves_the_shared_cassette_open(tmp_path):
+    path = tmp_path / "run.jsonl"
+    cassette = Cassette(str(path), RECORD)
+    run(CleanupQueue("http://bookstore.invalid", cassette=cassette), 204)
+    cassette.record("GET", URL, None, None, {}, build_response(200, {"books": []}, URL), 0.01)
+    cassette.close()
+    assert len(path.read_text().splitlines()) == 1
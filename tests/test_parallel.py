@@ -0,0 +1,14 @@
+from src.harness.parallel import ScenarioGroup, ScenarioRef, worker_locations
+
+
+def test_feature_file_with_most_expected_work_runs_first():
+    shard = [
+        ScenarioGroup([ScenarioRef("features/account.feature", 12, "slow", duration=5.0)]),
+        ScenarioGroup([ScenarioRef("features/bookstore.feature", 21, "later", duration=3.0)]),
+        ScenarioGroup([ScenarioRef("features/bookstore.feature", 6, "earlier", duration=3.0)]),
+    ]
+    assert worker_locations(shard) == [
+        "features/bookstore.feature:6",
+        "features/bookstore.feature:21",
+        "features/account.feature:12",
+    ]
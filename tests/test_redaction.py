@@ -0,0 +1,24 @@
+import logging
+
+from src.api.api_client import APIClient
+from src.api.responses import build_response
+
+
+def test_loggable_body_masks_passwords_and_tokens():
+    response = build_response(200, {"username": "afinapd", "password": "Afina12345!", "token": "abc"}, "http://x/")
+    body = APIClient(base_url="http://x").loggable_body(response)
+    assert "Afina12345!" not in body and "abc" not in body
+    assert "afinapd" in body
+
+
+def test_loggable_body_withholds_secret_bodies_that_are_not_json():
+    response = build_response(200, '"password": Afina12345!', "http://x/")
+    assert "Afina12345!" not in APIClient(base_url="http://x").loggable_body(response)
+
+
+def test_debug_request_log_masks_password(caplog):
+    with caplog.at_level(logging.DEBUG, logger="src.api.api_client"):
+        APIClient(base_url="http://x")._log_request("POST", "http://x/Account/v1/Login", {},
+                                                    {"userName": "afinapd", "password": "Afina12345!"})
+    assert "afinapd" in caplog.text
+    assert "Afina12345!" not in caplog.text
@@ -0,0 +1,208 @@
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+import requests
+from requests.exceptions import ContentDecodingError
+
+from src.api.api_client import APIClient
+from src.api.retry import CircuitBreaker, CircuitBreakers, CircuitOpenError, RetryPolicy, Throttle, parse_retry_after
+
+
+def response(status, headers=None):
+    return SimpleNamespace(status_code=status, headers=headers or {})
+
+
+class TestParseRetryAfter:
+    def test_seconds(self):
+        assert parse_retry_after("3") == 3.0
+
+    def test_http_date(self):
+        when = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+        assert 25 < parse_retry_after(when) <= 30
+
+    def test_missing_or_invalid(self):
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+
+class TestRetryPolicy:
+    def test_idempotent_method_retried_on_server_error(self):
+        assert RetryPolicy().should_retry("GET", "/BookStore/v1/Books", 0, response(503))
+
+    def test_non_idempotent_method_not_retried_on_server_error(self):
+        assert not RetryPolicy().should_retry("POST", "/BookStore/v1/Books", 0, response(503))
+
+    def test_safe_endpoint_retried_whatever_its_method(self):
+        assert RetryPolicy().should_retry("POST", "/Account/v1/Login", 0, response(503))
+
+    def test_any_method_retried_on_429(self):
+        assert RetryPolicy().should_retry("POST", "/BookStore/v1/Books", 0, response(429))
+
+    def test_client_errors_not_retried(self):
+        assert not RetryPolicy().should_retry("GET", "/BookStore/v1/Books", 0, response(404))
+
+    def test_attempts_limited(self):
+        policy = RetryPolicy(max_retries=2)
+        assert policy.should_retry("GET", "/BookStore/v1/Books", 1, response(503))
+        assert not policy.should_retry("GET", "/BookStore/v1/Books", 2, response(503))
+
+    def test_connection_errors_retried_only_when_idempotent(self):
+        policy = RetryPolicy()
+        error = requests.ConnectionError("reset")
+        assert policy.should_retry("GET", "/BookStore/v1/Books", 0, error=error)
+        assert not policy.should_retry("POST", "/BookStore/v1/Books", 0, error=error)
+
+    def test_other_errors_not_retried(self):
+        assert not RetryPolicy().should_retry("GET", "/BookStore/v1/Books", 0, error=ValueError("bad"))
+
+    def test_delay_grows_exponentially_within_jitter(self):
+        policy = RetryPolicy(backoff=1.0, jitter=0.25, max_backoff=100)
+        for attempt in range(4):
+            assert 0.75 * 2 ** attempt <= policy.delay(attempt) <= 1.25 * 2 ** attempt
+
+    def test_delay_capped(self):
+        assert RetryPolicy(backoff=1.0, jitter=0, max_backoff=5).delay(10) == 5
+
+    def test_retry_after_takes_precedence_and_is_capped(self):
+        policy = RetryPolicy(max_retry_after=10)
+        assert policy.delay(0, response(429, {"Retry-After": "2"})) == 2
+        assert policy.delay(0, response(429, {"Retry-After": "60"})) == 10
+
+
+class TestThrottle:
+    def test_unlimited_until_first_429(self):
+        throttle = Throttle()
+        assert throttle.rate is None
+        assert all(throttle.acquire() == 0 for _ in range(100))
+
+    def test_first_429_halves_observed_rate(self):
+        throttle = Throttle(max_rate=1000)
+        throttle.on_throttled()
+        assert throttle.rate == 500
+
+    def test_rate_decreases_multiplicatively_down_to_min(self):
+        throttle = Throttle(max_rate=8, min_rate=1)
+        for _ in range(10):
+            throttle.on_throttled()
+        assert throttle.rate == 1
+        assert throttle.throttled == 10
+
+    def test_rate_increases_additively_up_to_max(self):
+        throttle = Throttle(max_rate=4, increase=2)
+        throttle.on_throttled()
+        assert throttle.rate == 2
+        throttle.on_success()
+        assert throttle.rate == 3
+        for _ in range(10):
+            throttle.on_success()
+        assert throttle.rate == 4
+
+    def test_success_does_not_limit_an_unlimited_throttle(self):
+        throttle = Throttle()
+        throttle.on_success()
+        assert throttle.rate is None
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold_consecutive_failures(self):
+        breaker = CircuitBreaker(threshold=3, reset_timeout=60)
+        for _ in range(2):
+            breaker.record(failed=True)
+        assert breaker.allow()
+        breaker.record(failed=True)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+        breaker.record(failed=True)
+        breaker.record(failed=False)
+        breaker.record(failed=True)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_trial_closes_on_success(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+        breaker.record(failed=True)
+        assert breaker.allow()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        breaker.record(failed=False)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_trial_reopens_on_failure(self):
+        breaker = CircuitBreaker(threshold=5, reset_timeout=0)
+        for _ in range(5):
+            breaker.record(failed=True)
+        assert breaker.allow()
+        breaker.record(failed=True)
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_breakers_are_per_endpoint(self):
+        breakers = CircuitBreakers(threshold=1)
+        breakers.get("GET", "/BookStore/v1/Books").record(failed=True)
+        assert not breakers.get("GET", "/BookStore/v1/Books").allow()
+        assert breakers.get("POST", "/BookStore/v1/Books").allow()
+        assert breakers.stats() == {"GET /BookStore/v1/Books": CircuitBreaker.OPEN}
+
+
+class TestClientRetries:
+    @pytest.fixture
+    def client(self):
+        client = APIClient(
+            base_url="http://bookstore.invalid",
+            retry_policy=RetryPolicy(max_retries=2, backoff=0),
+            throttle=Throttle(),
+            breakers=CircuitBreakers(threshold=1, reset_timeout=0)
+        )
+        yield client
+        client.close()
+
+    def send_sequence(self, client, outcomes):
+        calls = []
+
+        def send(method, url, headers, **kwargs):
+            calls.append(method)
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return response(outcome)
+
+        client._send = send
+        return calls
+
+    def test_retries_until_success(self, client):
+        client.breakers = CircuitBreakers(threshold=5)
+        calls = self.send_sequence(client, [503, 503, 200])
+        result = client._send_with_retries("GET", "http://bookstore.invalid/BookStore/v1/Books", {})
+        assert result.status_code == 200
+        assert result.retries == 2
+        assert len(calls) == 3
+
+    def test_retry_count_set_on_raised_error(self, client):
+        client.breakers = CircuitBreakers(threshold=5)
+        self.send_sequence(client, [requests.ConnectionError("reset")] * 3)
+        with pytest.raises(requests.ConnectionError) as raised:
+            client._send_with_retries("GET", "http://bookstore.invalid/BookStore/v1/Books", {})
+        assert raised.value.retries == 2
+
+    def test_open_circuit_fails_fast(self, client):
+        client.breakers = CircuitBreakers(threshold=1, reset_timeout=60)
+        calls = self.send_sequence(client, [503])
+        client._send_with_retries("GET", "http://bookstore.invalid/BookStore/v1/Books", {})
+        with pytest.raises(CircuitOpenError):
+            client._send_with_retries("GET", "http://bookstore.invalid/BookStore/v1/Books", {})
+        assert len(calls) == 1
+
+    def test_unexpected_error_in_half_open_trial_is_recorded(self, client):
+        url = "http://bookstore.invalid/BookStore/v1/Books"
+        self.send_sequence(client, [
+            requests.ConnectionError("reset"), ContentDecodingError("bad gzip"), 200
+        ])
+        client.retry_policy = RetryPolicy(max_retries=0)
+        with pytest.raises(requests.ConnectionError):
+            client._send_with_retries("GET", url, {})
+        with pytest.raises(ContentDecodingError):
+            client._send_with_retries("GET", url, {})
+        assert client._send_with_retries("GET", url, {}).status_code == 200
+        assert client.breakers.get("GET", "/BookStore/v1/Books").state == CircuitBreaker.CLOSED
@@ -0,0 +1,58 @@
+import pytest
+
+from src.api.api_client import APIClient
+from src.api.schema import BOOK_SCHEMA, UNKNOWN_SCHEMA, schema_for, validate_response
+from src.harness.stub_server import StubServer
+
+USERNAME = "schemauser"
+PASSWORD = "Schema@12345!"
+
+
+@pytest.fixture(scope="module")
+def api():
+    with StubServer() as stub:
+        stub.state.add_user(USERNAME, PASSWORD)
+        with APIClient(base_url=stub.base_url) as api:
+            yield api
+
+
+def test_every_endpoint_response_satisfies_its_schema(api):
+    login = api.login(USERNAME, PASSWORD)
+    api.set_token(login.json()["token"])
+    user_id = login.json()["userId"]
+    responses = [
+        login,
+        api.generate_token(USERNAME, PASSWORD),
+        api.get_user(user_id),
+        api.create_user("schemanew", PASSWORD),
+        api.get_books(),
+        api.get_book(api.first_isbn()),
+        api.add_book(user_id, api.first_isbn()),
+    ]
+    for response in responses:
+        schema = schema_for(response)
+        assert schema is not UNKNOWN_SCHEMA, response.url
+        validate_response(response, schema).assert_valid()
+
+
+def test_fields_of_other_endpoints_are_reported_missing(api):
+    response = api.generate_token(USERNAME, PASSWORD)
+    with pytest.raises(AssertionError, match="'userId'"):
+        validate_response(response, schema_for(response)).assert_field("userId")
+
+
+def test_validation_cached_on_response(api):
+    response = api.get_books()
+    result = validate_response(response, BOOK_SCHEMA, path="books")
+    assert result.ok
+    assert validate_response(response, BOOK_SCHEMA, path="books") is result
+    assert response.validations[("Book", "books")] is result
+
+
+def test_failed_token_generation_is_reported(api):
+    response = api.generate_token(USERNAME, "Wrong@123")
+    result = validate_response(response, schema_for(response))
+    with pytest.raises(AssertionError, match="non-empty string"):
+        result.assert_field("token")
+    with pytest.raises(AssertionError, match="timestamp"):
+        result.assert_field("expires")
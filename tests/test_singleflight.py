@@ -0,0 +1,142 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.api.api_client import APIClient
+from src.api.responses import build_response
+from src.api.singleflight import SingleFlight, request_key
+
+URL = "http://bookstore.invalid/BookStore/v1/Books"
+TIMEOUT = 5
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class Blocking:
+    """Function counting its calls that returns once released"""
+
+    def __init__(self, result=None, error=None):
+        self.calls = 0
+        self.result = result
+        self.error = error
+        self.released = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+        assert self.released.wait(TIMEOUT)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class TestSingleFlight:
+    def test_concurrent_identical_calls_share_one_result(self):
+        flight = SingleFlight()
+        fn = Blocking(result=object())
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(flight.do, "key", fn) for _ in range(4)]
+            wait_for(lambda: flight.stats()["coalesced"] == 3)
+            fn.released.set()
+            results = [future.result() for future in futures]
+        assert fn.calls == 1
+        assert {id(result) for result, _ in results} == {id(fn.result)}
+        assert sorted(shared for _, shared in results) == [False, True, True, True]
+        assert flight.stats() == {"calls": 4, "coalesced": 3, "in_flight": 0}
+
+    def test_error_raised_to_every_caller(self):
+        flight = SingleFlight()
+        fn = Blocking(error=ValueError("bad"))
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(flight.do, "key", fn) for _ in range(2)]
+            wait_for(lambda: flight.stats()["coalesced"] == 1)
+            fn.released.set()
+            for future in futures:
+                with pytest.raises(ValueError):
+                    future.result()
+        assert fn.calls == 1
+
+    def test_different_keys_not_coalesced(self):
+        flight = SingleFlight()
+        fn = Blocking()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(flight.do, key, fn) for key in ("a", "b")]
+            wait_for(lambda: fn.calls == 2)
+            fn.released.set()
+            assert [shared for _, shared in (future.result() for future in futures)] == [False, False]
+        assert flight.stats()["coalesced"] == 0
+
+    def test_finished_call_not_cached(self):
+        flight = SingleFlight()
+        fn = Blocking()
+        fn.released.set()
+        flight.do("key", fn)
+        flight.do("key", fn)
+        assert fn.calls == 2
+
+
+class TestRequestKey:
+    def test_same_request_same_key(self):
+        headers = {"Authorization": "Bearer abc", "Accept": "application/json"}
+        assert request_key("GET", URL, {"ISBN": "1"}, headers) == request_key("GET", URL, {"ISBN": "1"}, dict(headers))
+
+    def test_tokens_params_and_headers_distinguish_keys(self):
+        key = request_key("GET", URL, None, {"Authorization": "Bearer abc"})
+        assert request_key("GET", URL, None, {"Authorization": "Bearer def"}) != key
+        assert request_key("GET", URL, None, {}) != key
+        assert request_key("GET", URL, {"ISBN": "1"}, {"Authorization": "Bearer abc"}) != key
+        assert request_key("GET", URL, None, {"Authorization": "Bearer abc", "If-None-Match": '"v1"'}) != key
+
+    def test_key_never_holds_the_token(self):
+        assert "abc" not in repr(request_key("GET", URL, None, {"Authorization": "Bearer abc"}))
+
+
+class TestClientCoalescing:
+    def clients(self, *tokens):
+        flight = SingleFlight()
+        send = Blocking(result=build_response(200, {"books": []}, URL))
+        clients = []
+        for token in tokens:
+            client = APIClient(base_url="http://bookstore.invalid", single_flight=flight)
+            client.set_token(token)
+            client._send = send
+            clients.append(client)
+        return flight, send, clients
+
+    def test_identical_gets_across_clients_send_once(self):
+        flight, send, clients = self.clients("abc", "abc")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(client.get_books, True) for client in clients]
+            wait_for(lambda: flight.stats()["coalesced"] == 1)
+            send.released.set()
+            responses = [future.result() for future in futures]
+        assert send.calls == 1
+        assert responses[0] is responses[1]
+
+    def test_gets_with_different_tokens_send_separately(self):
+        flight, send, clients = self.clients("abc", "def")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(client.get_books, True) for client in clients]
+            wait_for(lambda: send.calls == 2)
+            send.released.set()
+            for future in futures:
+                assert future.result().status_code == 200
+        assert flight.stats()["coalesced"] == 0
+
+    def test_posts_not_coalesced(self):
+        flight, send, clients = self.clients("abc", "abc")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(client.add_book, "42", "1") for client in clients]
+            wait_for(lambda: send.calls == 2)
+            send.released.set()
+            for future in futures:
+                future.result()
+        assert flight.stats()["calls"] == 0
@@ -0,0 +1,124 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.api.api_client import APIClient
+from src.api.token_cache import TokenCache
+from src.harness.snapshots import SnapshotStore, snapshot
+from src.harness.stub_server import StubServer
+
+USERNAME = "snapshotuser"
+PASSWORD = "Snapshot@12345!"
+
+
+@snapshot
+def login(context):
+    context.runs.append("login")
+    session = context.api.authenticate(context.test_data["username"], context.test_data["password"])
+    context.test_data["user_id"] = session["user_id"]
+
+
+def collection_has_book(context):
+    response = context.api.get_user_books(context.test_data["user_id"])
+    return any(book["isbn"] == context.test_data["isbn"] for book in response.json().get("books", []))
+
+
+@snapshot(check=collection_has_book)
+def have_book(context):
+    context.runs.append("have_book")
+    context.test_data["isbn"] = context.api.first_isbn()
+    context.api.add_book(context.test_data["user_id"], context.test_data["isbn"])
+
+
+@pytest.fixture
+def stub():
+    with StubServer() as stub:
+        stub.state.add_user(USERNAME, PASSWORD)
+        yield stub
+
+
+@pytest.fixture
+def context(stub):
+    with APIClient(base_url=stub.base_url, token_cache=TokenCache()) as api:
+        context = SimpleNamespace(api=api, snapshots=SnapshotStore(), runs=[])
+        new_scenario(context)
+        yield context
+
+
+def new_scenario(context):
+    """Reset per-scenario state the way the environment hooks do"""
+    context.api.set_token(None)
+    context.test_data = {"username": USERNAME, "password": PASSWORD, "user_id": "", "isbn": ""}
+    context.runs.clear()
+
+
+def finish(context, failed=False, tags=()):
+    context.snapshots.scenario_finished(context.test_data["username"], failed, tags)
+    new_scenario(context)
+
+
+def test_later_scenario_restores_state_and_token(context):
+    login(context)
+    user_id, token = context.test_data["user_id"], context.api.token
+    finish(context)
+    login(context)
+    assert context.runs == []
+    assert context.test_data["user_id"] == user_id
+    assert context.api.token == token
+    assert context.snapshots.stats()["hits"] == 1
+
+
+def test_failed_scenario_reruns_the_step_then_restores_again(context):
+    login(context)
+    finish(context)
+    login(context)
+    finish(context, failed=True)
+    assert context.snapshots.stats()["snapshots"] == 0
+
+    login(context)
+    assert context.runs == ["login"]
+    finish(context)
+    login(context)
+    assert context.runs == []
+    assert context.snapshots.stats() == {"hits": 2, "misses": 2, "invalidations": 1, "snapshots": 1}
+
+
+def test_mutating_scenario_invalidates_only_its_account(context):
+    login(context)
+    context.snapshots.scenario_finished("someone else", False, ["POST_Books"])
+    assert context.snapshots.stats()["snapshots"] == 1
+    finish(context, tags=["POST_Books"])
+    assert context.snapshots.stats()["snapshots"] == 0
+
+
+def test_stale_token_not_restored(context):
+    login(context)
+    finish(context)
+    context.api.token_cache.invalidate(USERNAME, PASSWORD)
+    login(context)
+    assert context.runs == ["login"]
+
+
+def test_server_side_state_checked_before_restore(stub, context):
+    login(context)
+    have_book(context)
+    finish(context)
+
+    login(context)
+    have_book(context)
+    assert context.runs == []
+
+    # The collection changed behind the snapshot's back
+    stub.state.find_user(USERNAME)["books"] = []
+    finish(context)
+    login(context)
+    have_book(context)
+    assert context.runs == ["have_book"]
+    assert collection_has_book(context)
+
+
+def test_without_store_step_always_runs(context):
+    context.snapshots = None
+    login(context)
+    login(context)
+    assert context.runs == ["login", "login"]
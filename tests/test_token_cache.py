@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.api.api_client import APIClient
+from src.api.token_cache import TokenCache
+from src.harness.stub_server import StubServer
+
+USERNAME = "tokenuser"
+PASSWORD = "Token@12345!"
+
+
+def timestamp(delta):
+    moment = datetime.now(timezone.utc) + delta
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+class TestTokenCache:
+    def test_fresh_token_reused(self):
+        cache = TokenCache()
+        cache.store(USERNAME, PASSWORD, token="abc", expires=timestamp(timedelta(hours=1)), user_id="42")
+        assert cache.get(USERNAME, PASSWORD)["token"] == "abc"
+        assert cache.stats()["hits"] == 1
+
+    def test_token_within_margin_of_expiry_not_reused(self):
+        cache = TokenCache(margin=timedelta(minutes=5))
+        cache.store(USERNAME, PASSWORD, token="abc", expires=timestamp(timedelta(minutes=4)), user_id="42")
+        assert cache.get(USERNAME, PASSWORD) is None
+        assert cache.stats()["misses"] == 1
+
+    def test_expired_or_unparseable_token_not_reused(self):
+        cache = TokenCache()
+        cache.store(USERNAME, PASSWORD, token="abc", expires=timestamp(timedelta(hours=-1)), user_id="42")
+        assert cache.get(USERNAME, PASSWORD) is None
+        cache.store(USERNAME, PASSWORD, token="abc", expires="tomorrow")
+        assert cache.get(USERNAME, PASSWORD) is None
+
+    def test_entry_without_user_id_not_reused(self):
+        cache = TokenCache()
+        cache.store(USERNAME, PASSWORD, token="abc", expires=timestamp(timedelta(hours=1)))
+        assert cache.get(USERNAME, PASSWORD) is None
+
+    def test_entries_keyed_by_password(self):
+        cache = TokenCache()
+        cache.store(USERNAME, PASSWORD, token="abc", expires=timestamp(timedelta(hours=1)), user_id="42")
+        assert cache.get(USERNAME, "Other@12345!") is None
+
+    def test_invalidate_user_drops_every_credential_set(self):
+        cache = TokenCache()
+        expires = timestamp(timedelta(hours=1))
+        cache.store(USERNAME, PASSWORD, token="abc", expires=expires, user_id="42")
+        cache.store(USERNAME, "Other@12345!", token="def", expires=expires, user_id="42")
+        cache.invalidate_user("42")
+        assert cache.stats()["entries"] == 0
+
+    def test_persisted_between_instances(self, tmp_path):
+        path = str(tmp_path / "tokens.json")
+        TokenCache(path=path).store(USERNAME, PASSWORD, token="abc", expires=timestamp(timedelta(hours=1)),
+                                    user_id="42")
+        assert TokenCache(path=path).get(USERNAME, PASSWORD)["token"] == "abc"
+
+    def test_unreadable_file_ignored(self, tmp_path):
+        path = tmp_path / "tokens.json"
+        path.write_text("{not json")
+        assert TokenCache(path=str(path)).stats()["entries"] == 0
+
+
+class TestAuthenticate:
+    @pytest.fixture
+    def stub(self):
+        with StubServer() as stub:
+            stub.state.add_user(USERNAME, PASSWORD)
+            yield stub
+
+    @pytest.fixture
+    def api(self, stub):
+        with APIClient(base_url=stub.base_url, token_cache=TokenCache()) as api:
+            api.sent = []
+            api.add_request_hook(api.sent.append)
+            yield api
+
+    def test_cached_token_sends_no_requests(self, api):
+        first = api.authenticate(USERNAME, PASSWORD)
+        sent = len(api.sent)
+        assert sent > 0
+        second = api.authenticate(USERNAME, PASSWORD)
+        assert len(api.sent) == sent
+        assert second["token"] == first["token"] == api.token
+
+    def test_expired_token_refreshed(self, stub, api):
+        stale = api.authenticate(USERNAME, PASSWORD)
+        # Expire the token on both sides so the server issues a new one
+        stub.state.find_user(USERNAME)["expires"] = timestamp(timedelta(hours=-1))
+        api.token_cache.store(USERNAME, PASSWORD, token=stale["token"], expires=timestamp(timedelta(hours=-1)))
+        sent = len(api.sent)
+        fresh = api.authenticate(USERNAME, PASSWORD)
+        assert len(api.sent) > sent
+        assert fresh["token"] != stale["token"]
+        assert api.token == fresh["token"]
+        assert api.token_cache.get(USERNAME, PASSWORD)["token"] == fresh["token"]